@@ -1,4 +1,6 @@
 import time
+import asyncio
+import threading
 import bittensor as bt
 from vectornet.base.miner import BaseMinerNeuron
 from vectornet.protocol import(
@@ -8,9 +10,12 @@ from vectornet.protocol import(
     DeleteSynapse,
 )
 from vectornet.utils.version import compare_version, get_version
-from vectornet.embedding.embed import TextToEmbedding
-from vectornet.database_manage.miner_db_manager import MinerDBManager
+from vectornet.embedding.embed import TextToEmbedding, warmup
+from vectornet.database_manage.storage_backend import get_db_manager, prepare_storage
+from vectornet.database_manage.async_miner_db_manager import AsyncMinerDBManager
+from vectornet.database_manage import compactor
 from vectornet.search_engine.search import SearchEngine
+from vectornet.search_engine.read_coalescer import ReadCoalescer
 
 RED = "\033[31m"
 GREEN = "\033[32m"
@@ -28,6 +33,14 @@ class Miner(BaseMinerNeuron):
     def __init__(self, config=None):
         super(Miner, self).__init__(config=config)
 
+        # Migrate known validator databases and normalize their older embeddings without delaying startup
+        threading.Thread(target=prepare_storage, daemon=True).start()
+        # Loads the embedding model while the axon starts; the first request waits for it if it arrives sooner
+        threading.Thread(target=warmup, daemon=True).start()
+        # Reclaims the vectors of deleted namespaces while no requests are coming in
+        compactor.start_compactor()
+        # Concurrent reads of the same namespace are answered by one batched search
+        self.read_coalescer = ReadCoalescer(self.read_batch)
 
         # TODO(developer): Anything specific to your use case you can do here
 
@@ -47,13 +60,11 @@ class Miner(BaseMinerNeuron):
             index_data = query.index_data
             validator_hotkey = query.dendrite.hotkey
             
-            validator_db_manager = MinerDBManager(validator_hotkey)
+            validator_db_manager = AsyncMinerDBManager(validator_hotkey)
             
-            embedding_manager = TextToEmbedding()
+            embeded_data, embeddings, original_data = await self.embed(index_data)
             
-            embeded_data, embeddings, original_data = embedding_manager.embed(index_data)
-            
-            user_id, organization_id, namespace_id, vector_ids = validator_db_manager.create_operation(request_type, user_name, organization_name, namespace_name, embeded_data, embeddings, original_data)
+            user_id, organization_id, namespace_id, vector_ids = await validator_db_manager.create_operation(request_type, user_name, organization_name, namespace_name, embeded_data, embeddings, original_data)
             results = (user_id, organization_id, namespace_id, vector_ids)
             
             bt.logging.info(f"{GREEN}Results of CreateRequest:{RESET} {results}")
@@ -82,21 +93,8 @@ class Miner(BaseMinerNeuron):
             size = query.size
             valdiator_hotkey = query.dendrite.hotkey
             
-            validator_db_manager = MinerDBManager(valdiator_hotkey)
-            
-            embedding_manager = TextToEmbedding()
-            
-            user_id, organization_id, namespace_id, vectors = validator_db_manager.read_operation(request_type, user_name, organization_name, namespace_name)
-            
-            if vectors is None:
-                bt.logging.error("Verify the ReadRequest functionality. An error occurred while attempting to read from the database using user_name, organization_name, and namespace_name.")
-                raise Exception("Verify the ReadRequest functionality. An error occurred while attempting to read from the database")
-                    
-            query_embedding = embedding_manager.embed([query_data])[1][0]
-            
-            search_engine = SearchEngine()
-            
-            top_vectors = search_engine.cosine_similarity_search(query_embedding, vectors, size)
+            read_key = (valdiator_hotkey, request_type, user_name, organization_name, namespace_name)
+            user_id, organization_id, namespace_id, top_vectors = await self.read_coalescer.submit(read_key, (query_data, size))
             
             # results = []
             # for top_vector in top_vectors:
@@ -113,6 +111,46 @@ class Miner(BaseMinerNeuron):
         except Exception as e:
             bt.logging.error(f"Error occurs during forward: {e}")
         
+    async def embed(self, texts):
+        """Embeds the texts on the default executor, so model inference does not block the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: TextToEmbedding().embed(texts))
+
+    def read_batch(self, read_key, queries):
+        """
+        Answers a batch of ReadSynapse queries on the same namespace with one read, one embedding
+        call and one batched search.
+
+        Args:
+            read_key (tuple): (validator hotkey, request type, user name, organization name, namespace name).
+            queries (list): (query_data, size) of every request.
+
+        Returns:
+            list: (user_id, organization_id, namespace_id, top_vectors) of every request, in order.
+        """
+        valdiator_hotkey, request_type, user_name, organization_name, namespace_name = read_key
+        compactor.record_activity()
+        validator_db_manager = get_db_manager(valdiator_hotkey)
+        user_id, organization_id, namespace_id, vectors = validator_db_manager.read_operation(request_type, user_name, organization_name, namespace_name)
+        
+        if vectors is None:
+            bt.logging.error("Verify the ReadRequest functionality. An error occurred while attempting to read from the database using user_name, organization_name, and namespace_name.")
+            raise Exception("Verify the ReadRequest functionality. An error occurred while attempting to read from the database")
+        
+        embedding_manager = TextToEmbedding()
+        query_embeddings = embedding_manager.embed([query_data for query_data, _ in queries])[1]
+        
+        search_engine = SearchEngine()
+        top_vectors_batch = search_engine.search_batch(
+            query_embeddings, vectors, [size for _, size in queries],
+            index_key=(valdiator_hotkey, namespace_id), query_texts=[query_data for query_data, _ in queries],
+        )
+        # One text lookup for the winners of the whole batch
+        validator_db_manager.hydrate_vectors([vector for top_vectors in top_vectors_batch for vector in top_vectors])
+        if len(queries) > 1:
+            bt.logging.debug(f"Answered {len(queries)} coalesced reads of namespace {namespace_id}")
+        return [(user_id, organization_id, namespace_id, top_vectors) for top_vectors in top_vectors_batch]
+
     async def forward_update_request(self, query: UpdateSynapse) -> UpdateSynapse:
         """
         processes the incoming UpdateSynapse by updating existing embeddings that saved in database
@@ -133,12 +171,10 @@ class Miner(BaseMinerNeuron):
             index_data = query.index_data
             validator_hotkey = query.dendrite.hotkey
             
-            validator_db_manager = MinerDBManager(validator_hotkey)
-            
-            embedding_manager = TextToEmbedding()
+            validator_db_manager = AsyncMinerDBManager(validator_hotkey)
             
-            embeded_data, embeddings, original_data = embedding_manager.embed(index_data)
-            user_id, organization_id, namespace_id, vector_ids = validator_db_manager.update_operation(request_type, perform, user_name, organization_name, namespace_name, embeded_data, embeddings, original_data)
+            embeded_data, embeddings, original_data = await self.embed(index_data)
+            user_id, organization_id, namespace_id, vector_ids = await validator_db_manager.update_operation(request_type, perform, user_name, organization_name, namespace_name, embeded_data, embeddings, original_data)
             results = (user_id, organization_id, namespace_id, vector_ids)
             
             bt.logging.info(f"{GREEN}Results of update request:{RESET} {results}")
@@ -166,8 +202,8 @@ class Miner(BaseMinerNeuron):
             namespace_name = query.namespace_name
             validator_hotkey = query.dendrite.hotkey
             
-            validator_db_manager = MinerDBManager(validator_hotkey)
-            user_id, organization_id, namespace_id = validator_db_manager.delete_operation(request_type, perform, user_name, organization_name, namespace_name)        
+            validator_db_manager = AsyncMinerDBManager(validator_hotkey)
+            user_id, organization_id, namespace_id = await validator_db_manager.delete_operation(request_type, perform, user_name, organization_name, namespace_name)        
 
             results = (user_id, organization_id, namespace_id)
             bt.logging.info(f"{GREEN}Results of delete request:{RESET} ({user_id}, {organization_id}, {namespace_id})")     
@@ -0,0 +1,45 @@
+import sys
+import argparse
+import subprocess
+
+# Modules whose import should stay cheap: they are loaded before any config parsing
+MODULES = (
+    "vectornet.embedding.embed",
+    "vectornet.evaludation.evaluate",
+    "vectornet.database_manage.storage_backend",
+    "vectornet.search_engine.search",
+)
+
+
+def import_time(module: str):
+    """
+    Imports the module in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (total seconds, [(seconds, package)] of the slowest top-level imports).
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr}")
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        if cumulative_us.strip().isdigit() and not name.startswith("  "):
+            # Top-level packages only; their time includes everything they import
+            cumulative[name.strip()] = int(cumulative_us) / 1e6
+    return sum(cumulative.values()), sorted(((seconds, name) for name, seconds in cumulative.items()), reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how long importing the miner's modules takes.")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--top", type=int, default=5, help="Slowest top-level imports shown per module")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        total, slowest = import_time(module)
+        print(f"{module}: {total:.3f}s")
+        for seconds, name in slowest[:args.top]:
+            print(f"    {seconds:.3f}s {name}")
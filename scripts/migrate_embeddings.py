@@ -0,0 +1,10 @@
+from vectornet.database_manage.miner_db_manager import MinerDBManager, embedding_format, list_validator_databases
+
+if __name__ == "__main__":
+
+    # Converts the stored embeddings of every validator database to MINER_EMBEDDING_FORMAT
+    for db_name in list_validator_databases():
+        db_manager = MinerDBManager(db_name)
+        converted = db_manager.migrate_embeddings()
+        db_manager.close_connection()
+        print(f"{db_name}: converted {converted} embeddings to '{embedding_format}'")
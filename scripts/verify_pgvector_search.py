@@ -0,0 +1,58 @@
+import argparse
+from psycopg2 import sql
+from vectornet.benchmark.synthetic import synthetic_namespace, synthetic_queries
+from vectornet.database_manage import miner_db_manager
+from vectornet.database_manage.connection_pool import get_pool
+from vectornet.database_manage.miner_db_manager import MinerDBManager
+from vectornet.search_engine.search import SearchEngine
+
+
+def drop_database(db_name):
+    get_pool(db_name).close()
+    with get_pool('postgres').connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql.SQL("DROP DATABASE IF EXISTS {} WITH (FORCE)").format(sql.Identifier(db_name)))
+
+
+if __name__ == "__main__":
+    # Stores a synthetic namespace in a scratch database and checks that the pgvector backend finds
+    # the same nearest neighbours as the in-process search. Needs a local Postgres with pgvector.
+    parser = argparse.ArgumentParser(description="Compare the pgvector search backend with the local one.")
+    parser.add_argument("--size", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--db-name", default="pgvector_search_check")
+    args = parser.parse_args()
+
+    embeddings = synthetic_namespace(args.size, miner_db_manager.embedding_dim)
+    queries = synthetic_queries(embeddings, args.queries)
+    texts = [f"text {i}" for i in range(args.size)]
+
+    drop_database(args.db_name)
+    miner_db_manager.search_backend = 'pgvector'
+    miner_db_manager.pgvector_enabled = True
+    try:
+        db_manager = MinerDBManager(args.db_name)
+        db_manager.create_operation('create', 'user', 'organization', 'namespace', texts, embeddings.tolist(), texts)
+        if not db_manager.uses_pgvector():
+            raise SystemExit("The pgvector extension is not available in this Postgres.")
+
+        search_engine = SearchEngine()
+        results = {}
+        for backend in ('pgvector', 'local'):
+            miner_db_manager.search_backend = backend
+            _, _, _, vectors = db_manager.read_operation('read', 'user', 'organization', 'namespace')
+            results[backend] = search_engine.search_batch(queries, vectors, args.k)
+
+        hits = sum(
+            len({vector['vector_id'] for vector in pgvector_top} & {vector['vector_id'] for vector in local_top})
+            for pgvector_top, local_top in zip(results['pgvector'], results['local'])
+        )
+        similarity_error = max(
+            abs(pgvector_top[0]['similarity'] - local_top[0]['similarity'])
+            for pgvector_top, local_top in zip(results['pgvector'], results['local'])
+        )
+        print(f"recall@{args.k} of pgvector against the local search: {hits / (args.queries * args.k):.3f}")
+        print(f"largest top-1 similarity difference: {similarity_error:.2e}")
+    finally:
+        drop_database(args.db_name)
@@ -0,0 +1,203 @@
+"""
+Scaling benchmark of the miner search engine.
+
+Generates synthetic namespaces with known nearest neighbours, runs every search backend on them
+and reports latency percentiles, QPS, build time, peak RSS and recall@k as JSON:
+
+    python -m vectornet.benchmark.search_benchmark --sizes 1000 10000 100000 1000000 --output benchmark.json
+
+Every (size, backend) pair runs in a forked child process, so the peak RSS of one backend is
+not inflated by the memory of the ones measured before it. The namespace itself is generated
+once in the parent and shared with the children copy-on-write; it is included in the RSS.
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import numpy as np
+from vectornet.benchmark.synthetic import synthetic_namespace, synthetic_queries, ground_truth
+from vectornet.database_manage.namespace_vectors import NamespaceVectors
+from vectornet.search_engine import index_registry
+from vectornet.search_engine.hnsw import HNSWIndex
+from vectornet.search_engine.ivfpq import IVFPQIndex
+from vectornet.search_engine.kernels import normalize_rows
+from vectornet.search_engine.quantization import QuantizedEmbeddings
+from vectornet.search_engine.search import SearchEngine
+
+BACKENDS = ('brute_force', 'normalized', 'float16', 'int8', 'hnsw', 'ivfpq')
+# Index backends past these sizes take hours to build in pure Python and are skipped by default
+DEFAULT_MAX_INDEX_SIZE = {'hnsw': 100000, 'ivfpq': 1000000}
+
+
+def build_backend(backend: str, vector_ids, embeddings):
+    """
+    Builds a backend over the namespace the way the miner would serve it.
+
+    Returns:
+        tuple: (search, batch_search). search(query, k) returns the result vector ids of one query;
+        batch_search(queries, k) those of several queries, or is None if the backend has no batched path.
+    """
+    search_engine = SearchEngine()
+    if backend in ('brute_force', 'normalized', 'float16', 'int8'):
+        if backend == 'normalized':
+            vectors = NamespaceVectors(vector_ids, normalize_rows(embeddings), normalized=True)
+        elif backend in ('float16', 'int8'):
+            vectors = NamespaceVectors(vector_ids, QuantizedEmbeddings.quantize(embeddings, backend))
+        else:
+            vectors = NamespaceVectors(vector_ids, embeddings)
+
+        def search(query, k):
+            return [result['vector_id'] for result in search_engine.cosine_similarity_search(query, vectors, k)]
+
+        def batch_search(queries, k):
+            return [[result['vector_id'] for result in results] for results in search_engine.search_batch(queries, vectors, k)]
+
+        return search, batch_search
+
+    dim = embeddings.shape[1]
+    if backend == 'hnsw':
+        index = HNSWIndex(dim, m=index_registry.hnsw_m, ef_construction=index_registry.hnsw_ef_construction, ef_search=index_registry.hnsw_ef_search)
+    elif backend == 'ivfpq':
+        index = IVFPQIndex(dim, nlist=index_registry.ivf_nlist, pq_m=index_registry.pq_m, nprobe=index_registry.ivf_nprobe)
+    else:
+        raise ValueError(f"Unknown search backend: {backend}")
+    index.add(vector_ids, embeddings)
+    vectors = NamespaceVectors(vector_ids, embeddings)
+
+    def search(query, k):
+        # Index candidates re-ranked exactly, as SearchEngine does for indexed namespaces
+        return [result['vector_id'] for result in search_engine.index_search(index, query, vectors, k)]
+
+    return search, None
+
+
+def percentile_ms(latencies, q):
+    return float(np.percentile(latencies, q) * 1000)
+
+
+def run_backend(backend: str, embeddings, queries, truth, k: int, batch_size: int):
+    """Builds one backend and measures it; runs in the child process of measure_backend."""
+    vector_ids = np.arange(embeddings.shape[0], dtype=np.int64)
+    start = time.perf_counter()
+    search, batch_search = build_backend(backend, vector_ids, embeddings)
+    build_seconds = time.perf_counter() - start
+
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query, k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(found) & set(expected.tolist()))
+
+    result = {
+        'build_seconds': build_seconds,
+        'p50_ms': percentile_ms(latencies, 50),
+        'p95_ms': percentile_ms(latencies, 95),
+        'p99_ms': percentile_ms(latencies, 99),
+        'qps': len(queries) / sum(latencies),
+        f'recall_at_{k}': hits / (len(queries) * k),
+    }
+    if batch_search is not None:
+        start = time.perf_counter()
+        for batch_start in range(0, len(queries), batch_size):
+            batch_search(queries[batch_start:batch_start + batch_size], k)
+        result['batch_qps'] = len(queries) / (time.perf_counter() - start)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result['peak_rss_mb'] = max_rss / (1024 * 1024 if platform.system() == 'Darwin' else 1024)
+    return result
+
+
+def _child(connection, *args):
+    try:
+        connection.send(run_backend(*args))
+    except Exception as e:
+        connection.send({'error': repr(e)})
+    finally:
+        connection.close()
+
+
+def measure_backend(backend: str, embeddings, queries, truth, k: int, batch_size: int) -> dict:
+    """Runs run_backend in a forked child process and returns its measurements."""
+    context = multiprocessing.get_context('fork')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(sender, backend, embeddings, queries, truth, k, batch_size))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {'error': 'benchmark process died (out of memory?)'}
+    process.join()
+    return result
+
+
+def run_benchmark(sizes, backends=BACKENDS, dim: int = 768, queries: int = 200, k: int = 10, batch_size: int = 32,
+                  max_index_size: dict = None, seed: int = 0) -> dict:
+    """
+    Benchmarks every backend on a synthetic namespace of every size.
+
+    Returns:
+        dict: The benchmark configuration and one result row per (size, backend).
+    """
+    max_index_size = {**DEFAULT_MAX_INDEX_SIZE, **(max_index_size or {})}
+    rows = []
+    for size in sizes:
+        embeddings = synthetic_namespace(size, dim, seed=seed)
+        query_embeddings = synthetic_queries(embeddings, queries, seed=seed + 1)
+        truth = ground_truth(query_embeddings, embeddings, k)
+        for backend in backends:
+            row = {'size': size, 'backend': backend}
+            if size > max_index_size.get(backend, size):
+                row['skipped'] = f"size exceeds the {backend} limit of {max_index_size[backend]}"
+            else:
+                row.update(measure_backend(backend, embeddings, query_embeddings, truth, k, batch_size))
+            rows.append(row)
+            print(json.dumps(row), file=sys.stderr, flush=True)  # Progress; the report goes to stdout or --output
+        del embeddings
+
+    return {
+        'config': {
+            'sizes': list(sizes), 'backends': list(backends), 'dim': dim, 'queries': queries, 'k': k,
+            'batch_size': batch_size, 'max_index_size': max_index_size, 'seed': seed,
+            'index': {
+                'hnsw_m': index_registry.hnsw_m, 'hnsw_ef_construction': index_registry.hnsw_ef_construction,
+                'hnsw_ef_search': index_registry.hnsw_ef_search, 'ivf_nlist': index_registry.ivf_nlist,
+                'ivf_nprobe': index_registry.ivf_nprobe, 'pq_m': index_registry.pq_m,
+                'rerank_factor': index_registry.rerank_factor,
+            },
+        },
+        'results': rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the miner search backends on synthetic namespaces.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimension (768 for Longformer)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32, help="Queries per search_batch call for batch_qps")
+    parser.add_argument("--max-hnsw-size", type=int, default=DEFAULT_MAX_INDEX_SIZE['hnsw'])
+    parser.add_argument("--max-ivfpq-size", type=int, default=DEFAULT_MAX_INDEX_SIZE['ivfpq'])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.sizes, args.backends, dim=args.dim, queries=args.queries, k=args.k, batch_size=args.batch_size,
+        max_index_size={'hnsw': args.max_hnsw_size, 'ivfpq': args.max_ivfpq_size}, seed=args.seed,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import numpy as np
+from vectornet.search_engine.kernels import normalize_rows, top_k_indices
+
+
+def synthetic_namespace(size: int, dim: int, clusters: int = 100, spread: float = 0.3, seed: int = 0, chunk_size: int = 65536):
+    """
+    Generates the embeddings of a synthetic namespace.
+
+    Embeddings are drawn around random cluster centers, so that neighbours are meaningful the way
+    they are for topic-grouped text chunks, unlike with uniformly random vectors.
+
+    Args:
+        size (int): Number of embeddings.
+        dim (int): Embedding dimension.
+        clusters (int): Number of cluster centers.
+        spread (float): Standard deviation of an embedding around its center, relative to the center's norm.
+        seed (int): Seed of the generator; the same arguments always give the same namespace.
+        chunk_size (int): Rows generated at once, bounding the temporary memory.
+
+    Returns:
+        np.ndarray: A (size, dim) float32 matrix.
+    """
+    rng = np.random.default_rng(seed)
+    centers = normalize_rows(rng.standard_normal((clusters, dim), dtype=np.float32))
+    embeddings = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, chunk_size):
+        stop = min(start + chunk_size, size)
+        assignments = rng.integers(0, clusters, stop - start)
+        noise = rng.standard_normal((stop - start, dim), dtype=np.float32) * (spread / np.sqrt(dim))
+        embeddings[start:stop] = centers[assignments] + noise
+    return embeddings
+
+
+def synthetic_queries(embeddings, count: int, noise: float = 0.1, seed: int = 1):
+    """
+    Generates queries as perturbed copies of random stored embeddings, like a validator query that
+    paraphrases one stored chunk.
+
+    Returns:
+        np.ndarray: A (count, dim) float32 matrix.
+    """
+    rng = np.random.default_rng(seed)
+    dim = embeddings.shape[1]
+    sources = embeddings[rng.choice(embeddings.shape[0], count, replace=embeddings.shape[0] < count)]
+    scale = np.linalg.norm(sources, axis=1, keepdims=True) * (noise / np.sqrt(dim))
+    return sources + rng.standard_normal((count, dim), dtype=np.float32) * scale
+
+
+def ground_truth(queries, embeddings, k: int, chunk_size: int = 65536):
+    """
+    Exact cosine top-k of every query, scanning the embeddings chunk by chunk.
+
+    Returns:
+        np.ndarray: A (len(queries), k) matrix of embedding positions, best first.
+    """
+    normalized_queries = normalize_rows(np.asarray(queries, dtype=np.float32))
+    best_positions = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+    for start in range(0, embeddings.shape[0], chunk_size):
+        chunk = normalize_rows(embeddings[start:start + chunk_size])
+        positions = np.concatenate([best_positions, np.broadcast_to(np.arange(start, start + len(chunk)), (len(queries), len(chunk)))], axis=1)
+        scores = np.concatenate([best_scores, normalized_queries @ chunk.T], axis=1)
+        winners = np.stack([top_k_indices(row, k) for row in scores])
+        best_positions = np.take_along_axis(positions, winners, axis=1)
+        best_scores = np.take_along_axis(scores, winners, axis=1)
+    return best_positions
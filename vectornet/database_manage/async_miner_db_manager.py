@@ -0,0 +1,62 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from dotenv import load_dotenv
+from vectornet.database_manage.connection_pool import pool_max_size
+from vectornet.database_manage.storage_backend import get_db_manager
+from vectornet.database_manage import compactor
+
+load_dotenv()
+# Worker threads running database operations for the async handlers; with one per pooled
+# connection, an operation never waits for a connection while holding a thread
+db_threads = int(os.getenv("MINER_DB_THREADS", pool_max_size))
+
+_executor = ThreadPoolExecutor(max_workers=max(db_threads, 1), thread_name_prefix="miner-db")
+
+
+async def run_db_operation(function, *args, **kwargs):
+    """Run a blocking database call on the database worker threads and wait for it without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(function, *args, **kwargs))
+
+
+class AsyncMinerDBManager:
+    """
+    Awaitable counterpart of MinerDBManager (or the configured MINER_STORAGE_BACKEND) for the
+    miner's async forward handlers.
+
+    Every operation runs on a dedicated thread pool with its own manager, which borrows a pooled
+    connection for the duration of the call. The event loop keeps serving other synapses
+    while a query, bulk insert or delete is in flight, and a slow operation only occupies one
+    worker thread.
+    """
+
+    def __init__(self, validator_hotkey: str):
+        self.db_name = validator_hotkey
+
+    async def _call(self, operation: str, *args):
+        # The manager is built on the worker thread too, as SQLite connections belong to the thread that opened them
+        compactor.record_activity()
+        return await run_db_operation(lambda: getattr(get_db_manager(self.db_name), operation)(*args))
+
+    async def create_operation(self, request_type: str, user_name: str, organization_name: str, namespace_name: str, texts: List[str], embeddings: List[List[float]], original_texts: List[str]):
+        """Handle create operations."""
+        return await self._call('create_operation', request_type, user_name, organization_name, namespace_name, texts, embeddings, original_texts)
+
+    async def read_operation(self, request_type: str, user_name: str, organization_name: str, namespace_name: str):
+        """Handle read operations."""
+        return await self._call('read_operation', request_type, user_name, organization_name, namespace_name)
+
+    async def hydrate_vectors(self, vectors: List[dict]) -> List[dict]:
+        """Fill in 'original_text' and 'text' of the given vector dictionaries that were read without them."""
+        return await self._call('hydrate_vectors', vectors)
+
+    async def update_operation(self, request_type: str, perform: str, user_name: str, organization_name: str, namespace_name: str, texts: List[str], embeddings: List[List[float]], original_texts):
+        """Handle update operations."""
+        return await self._call('update_operation', request_type, perform, user_name, organization_name, namespace_name, texts, embeddings, original_texts)
+
+    async def delete_operation(self, request_type: str, perform: str, user_name: Optional[str] = None, organization_name: Optional[str] = None, namespace_name: Optional[str] = None):
+        """Handle delete operations."""
+        return await self._call('delete_operation', request_type, perform, user_name, organization_name, namespace_name)
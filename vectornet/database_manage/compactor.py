@@ -0,0 +1,72 @@
+import os
+import time
+import threading
+import bittensor as bt
+from dotenv import load_dotenv
+
+load_dotenv()
+# Compaction only runs once no request has arrived for this long
+compaction_idle_seconds = float(os.getenv("MINER_COMPACTION_IDLE_SECONDS", 10))
+compaction_interval_seconds = float(os.getenv("MINER_COMPACTION_INTERVAL_SECONDS", 30))
+# Vector rows removed per delete statement (and per transaction)
+compaction_batch_rows = int(os.getenv("MINER_COMPACTION_BATCH_ROWS", 5000))
+
+_last_activity = time.monotonic()
+# Databases that may hold tombstones
+_pending = set()
+_pending_lock = threading.Lock()
+_thread = None
+
+
+def record_activity():
+    """Marks the miner busy; called for every request that reaches the storage."""
+    global _last_activity
+    _last_activity = time.monotonic()
+
+
+def is_idle() -> bool:
+    return time.monotonic() - _last_activity >= compaction_idle_seconds
+
+
+def schedule(db_name: str):
+    """Queues a database whose deletes left tombstones behind."""
+    with _pending_lock:
+        _pending.add(db_name)
+
+
+def start_compactor():
+    """Starts the background compaction thread, once per process."""
+    global _thread
+    with _pending_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_compact_forever, daemon=True)
+            _thread.start()
+
+
+def _compact_forever():
+    from vectornet.database_manage.storage_backend import get_db_manager, list_databases
+
+    # Tombstones of earlier runs are picked up too
+    try:
+        for db_name in list_databases():
+            schedule(db_name)
+    except Exception as e:
+        bt.logging.error(f"Error listing databases to compact: {e}")
+
+    while True:
+        time.sleep(compaction_interval_seconds)
+        with _pending_lock:
+            db_names = sorted(_pending)
+        for db_name in db_names:
+            if not is_idle():
+                break
+            # Dequeued first, so a delete landing during compaction queues the database again
+            with _pending_lock:
+                _pending.discard(db_name)
+            try:
+                finished = get_db_manager(db_name).compact(compaction_batch_rows, is_idle)
+            except Exception as e:
+                bt.logging.error(f"Error compacting '{db_name}': {e}")
+                finished = False
+            if not finished:
+                schedule(db_name)
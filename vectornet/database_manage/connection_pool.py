@@ -0,0 +1,171 @@
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+import psycopg2
+import psycopg2.extensions
+import bittensor as bt
+from dotenv import load_dotenv
+
+load_dotenv()
+db_user_name = os.getenv("POSTGRESQL_USER_NAME")
+password = os.getenv("POSTGRES_PASSWORD")
+db_port = os.getenv("DB_PORT")
+pool_min_size = int(os.getenv("MINER_DB_POOL_MIN", 1))
+pool_max_size = int(os.getenv("MINER_DB_POOL_MAX", 8))
+pool_idle_seconds = float(os.getenv("MINER_DB_POOL_IDLE_SECONDS", 300))
+pool_health_check_seconds = float(os.getenv("MINER_DB_POOL_HEALTH_CHECK_SECONDS", 30))
+pool_timeout_seconds = float(os.getenv("MINER_DB_POOL_TIMEOUT_SECONDS", 30))
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of autocommit connections to one Postgres database.
+
+    Borrowers wait for a free connection once `max_size` are open. A connection that sat idle for
+    longer than `health_check_seconds` is pinged before being handed out, and dead ones are
+    replaced. `reap` closes connections idle for longer than `idle_seconds`, keeping `min_size`.
+    """
+
+    def __init__(self, db_name: str, min_size: int = pool_min_size, max_size: int = pool_max_size,
+                 idle_seconds: float = pool_idle_seconds, health_check_seconds: float = pool_health_check_seconds,
+                 timeout_seconds: float = pool_timeout_seconds):
+        self.db_name = db_name
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_seconds = idle_seconds
+        self.health_check_seconds = health_check_seconds
+        self.timeout_seconds = timeout_seconds
+        self._idle = deque()  # (connection, time it was returned), most recently returned last
+        self._open = 0
+        self._condition = threading.Condition()
+
+    def _connect(self):
+        conn = psycopg2.connect(dbname=self.db_name, user=db_user_name, password=password, host='localhost', port=db_port)
+        conn.autocommit = True
+        return conn
+
+    def getconn(self):
+        """Borrows a healthy connection, opening one if none is idle and the pool is not full."""
+        deadline = time.monotonic() + self.timeout_seconds
+        while True:
+            with self._condition:
+                while not self._idle and self._open >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Exception(f"Timed out waiting for a connection to '{self.db_name}' ({self.max_size} in use).")
+                    self._condition.wait(remaining)
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    conn, returned_at = None, None
+                    self._open += 1
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._forget()
+                    raise
+            if self._is_healthy(conn, returned_at):
+                return conn
+            self._discard(conn)
+
+    def putconn(self, conn):
+        """Returns a borrowed connection; broken ones are closed instead of being pooled again."""
+        if conn.closed:
+            self._forget()
+            return
+        try:
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._condition:
+            self._idle.append((conn, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def reap(self):
+        """Closes the connections idle for longer than idle_seconds, keeping at least min_size open."""
+        cutoff = time.monotonic() - self.idle_seconds
+        expired = []
+        with self._condition:
+            # The least recently returned connections sit at the left end
+            while self._idle and self._open - len(expired) > self.min_size and self._idle[0][1] < cutoff:
+                expired.append(self._idle.popleft()[0])
+        for conn in expired:
+            self._discard(conn)
+
+    def close(self):
+        """Closes every idle connection, e.g. at shutdown."""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {'open': self._open, 'idle': len(self._idle), 'max_size': self.max_size}
+
+    def _is_healthy(self, conn, returned_at) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.health_check_seconds:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return True
+        except Exception as e:
+            bt.logging.debug(f"Dropping dead connection to '{self.db_name}': {e}")
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._forget()
+
+    def _forget(self):
+        with self._condition:
+            self._open -= 1
+            self._condition.notify()
+
+
+# Process-wide pools keyed by database name ('postgres' for the admin connection).
+_pools = {}
+_pools_lock = threading.Lock()
+_reaper = None
+
+
+def get_pool(db_name: str) -> ConnectionPool:
+    """Returns the pool of the database, creating it (and the idle reaper thread) on first use."""
+    global _reaper
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = _pools[db_name] = ConnectionPool(db_name)
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_forever, daemon=True)
+            _reaper.start()
+        return pool
+
+
+def _reap_forever():
+    while True:
+        time.sleep(max(pool_idle_seconds / 2, 1))
+        with _pools_lock:
+            pools = list(_pools.values())
+        for pool in pools:
+            pool.reap()
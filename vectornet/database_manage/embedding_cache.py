@@ -0,0 +1,196 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+from vectornet.database_manage.namespace_vectors import NamespaceVectors
+from vectornet.search_engine.quantization import QuantizedEmbeddings
+
+load_dotenv()
+cache_bytes = int(os.getenv("MINER_CACHE_BYTES", 2 * 1024 * 1024 * 1024))  # 2 GB
+
+
+class _CacheEntry:
+    """Embedding matrix and id array of one namespace, with spare capacity so appends are amortized O(1)."""
+
+    def __init__(self, vector_ids, embeddings, normalized=False):
+        self.size = len(vector_ids)
+        self.vector_ids = np.asarray(vector_ids, dtype=np.int64)
+        self.embeddings = embeddings
+        # Appended rows are always normalized by the write path, so the flag survives appends
+        self.normalized = normalized
+
+    @property
+    def nbytes(self) -> int:
+        return self.vector_ids.nbytes + self.embeddings.nbytes
+
+    def append(self, vector_ids, embeddings) -> bool:
+        """Appends rows to the entry. Returns False when they cannot be merged into its representation."""
+        if isinstance(self.embeddings, QuantizedEmbeddings) or isinstance(embeddings, QuantizedEmbeddings):
+            if not (
+                isinstance(self.embeddings, QuantizedEmbeddings) and isinstance(embeddings, QuantizedEmbeddings)
+                and self.embeddings.embedding_format == embeddings.embedding_format
+            ):
+                return False
+            self.vector_ids = np.concatenate([self.vector_ids[:self.size], np.asarray(vector_ids, dtype=np.int64)])
+            self.embeddings = self.embeddings[:self.size].concatenate(embeddings)
+            self.size = len(self.vector_ids)
+            return True
+
+        embeddings = np.asarray(embeddings, dtype=np.float32).reshape(len(vector_ids), -1)
+        needed = self.size + len(vector_ids)
+        if needed > self.vector_ids.shape[0] or isinstance(self.embeddings, np.memmap):
+            capacity = max(needed, 2 * self.size)
+            grown_ids = np.empty(capacity, dtype=np.int64)
+            grown_embeddings = np.empty((capacity, embeddings.shape[1]), dtype=np.float32)
+            if self.size:
+                grown_ids[:self.size] = self.vector_ids[:self.size]
+                grown_embeddings[:self.size] = self.embeddings[:self.size]
+            self.vector_ids, self.embeddings = grown_ids, grown_embeddings
+        self.vector_ids[self.size:needed] = vector_ids
+        self.embeddings[self.size:needed] = embeddings
+        self.size = needed
+        return True
+
+    def snapshot(self) -> NamespaceVectors:
+        # Views of the filled prefix; later appends only write past it, so snapshots stay consistent
+        if len(self.embeddings) == self.size:
+            return NamespaceVectors(self.vector_ids, self.embeddings, normalized=self.normalized)
+        return NamespaceVectors(self.vector_ids[:self.size], self.embeddings[:self.size], normalized=self.normalized)
+
+
+class EmbeddingCache:
+    """
+    In-process LRU cache of namespace embeddings keyed by (validator hotkey, namespace_id).
+
+    Entries are evicted least recently used first once their total size exceeds `max_bytes`.
+    Writers keep entries coherent through `extend`, `replace` and `invalidate`. Every key has a
+    version, bumped by every write whether or not the namespace is cached: readers pass the
+    version they saw before loading the namespace to `put`, so a load that raced with any write
+    is not cached. Every key also has a generation, bumped by `replace` and `invalidate` only:
+    writers pass the one they saw once they held the namespace's write lock to `extend`, and an
+    append that raced with a replace drops the entry instead of guessing which side of the
+    replace its rows belong to.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._generations = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached NamespaceVectors of the namespace, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.snapshot()
+
+    def version(self, key) -> int:
+        with self._lock:
+            return self._versions.get(key, 0)
+
+    def generation(self, key) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def put(self, key, vector_ids, embeddings, normalized=False, version=None):
+        """Caches the namespace, evicting older entries as needed. Namespaces larger than the budget are not cached."""
+        entry = _CacheEntry(vector_ids, embeddings, normalized)
+        with self._lock:
+            if version is not None and version != self._versions.get(key, 0):
+                return  # Loaded while the namespace was written to
+            self._insert(key, entry)
+
+    def extend(self, key, vector_ids, embeddings, generation=None):
+        """Appends newly written vectors to a cached namespace, if it is cached, or drops it if they don't fit its format."""
+        if not len(vector_ids):
+            return
+        with self._lock:
+            # Loads in flight may have missed these rows
+            self._versions[key] = self._versions.get(key, 0) + 1
+            if generation is not None and generation != self._generations.get(key, 0):
+                # Raced with a replace; the next read reloads the committed set
+                self._remove(key)
+                return
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            self._bytes -= entry.nbytes
+            if not entry.append(vector_ids, embeddings):
+                del self._entries[key]
+                return
+            self._bytes += entry.nbytes
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def replace(self, key, vector_ids, embeddings, normalized=False, version=None):
+        """
+        Swaps in the new vector set of a replaced namespace; loads and writes begun before are dropped.
+        With the `version` seen under the namespace's write lock, an append that reached the cache
+        since, and may belong after the replace, makes it drop the entry instead.
+        """
+        entry = _CacheEntry(vector_ids, embeddings, normalized)
+        with self._lock:
+            current = self._versions.get(key, 0)
+            self._bump(key)
+            self._remove(key)
+            if version is None or version == current:
+                self._insert(key, entry)
+
+    def discard(self, key):
+        """Drops the entry to free its memory; unlike invalidate, loads in flight may still cache it."""
+        with self._lock:
+            self._remove(key)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._bump(key)
+            self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def _bump(self, key):
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def _insert(self, key, entry):
+        self._remove(key)
+        if entry.nbytes > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.nbytes
+        self._evict()
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.nbytes
+            self.evictions += 1
+
+
+# Shared by every MinerDBManager of the process.
+embedding_cache = EmbeddingCache(cache_bytes)
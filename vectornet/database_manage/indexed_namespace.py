@@ -0,0 +1,39 @@
+import numpy as np
+
+
+class IndexedNamespace:
+    """
+    A namespace searched through its IVF-PQ index alone, without its embedding matrix in memory.
+
+    Read operations return it instead of NamespaceVectors once MINER_INDEX_TYPE is ivfpq and the
+    namespace's index is ready, and drop the matrix cached while the index was built. The index
+    keeps pq_m bytes per vector; the exact re-rank of its candidates reads their embeddings from
+    the namespace's storage (the vectors table or the segment) through `fetch_embeddings`.
+    """
+
+    def __init__(self, search_index, fetch_embeddings, size: int):
+        """
+        Args:
+            search_index: The namespace's ready index; writes of this process keep it in step with storage.
+            fetch_embeddings (callable): Maps a list of vector ids to (vector_ids, (n, dim) float32
+                matrix) of those that are stored, in any order.
+            size (int): Vectors in the index or queued for it (see index_registry.get_index_with_pending).
+        """
+        self.search_index = search_index
+        self.fetch_embeddings = fetch_embeddings
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def fetch(self, vector_ids):
+        """Returns the vector dictionaries, without texts, of the given ids in the given order, skipping unknown ids."""
+        wanted = [int(vector_id) for vector_id in vector_ids]
+        if not wanted:
+            return []
+        found_ids, embeddings = self.fetch_embeddings(wanted)
+        position_by_id = {int(vector_id): position for position, vector_id in enumerate(np.asarray(found_ids).tolist())}
+        return [
+            {'original_text': None, 'text': None, 'embedding': embeddings[position_by_id[vector_id]], 'vector_id': vector_id}
+            for vector_id in wanted if vector_id in position_by_id
+        ]
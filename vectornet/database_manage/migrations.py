@@ -0,0 +1,174 @@
+import threading
+import bittensor as bt
+
+# Versioned schema of a miner's validator database. Append new migrations at the end with the
+# next version number and never edit an applied one; every statement must be safe to run on
+# databases that were created by older miners without the schema_migrations table.
+MIGRATIONS = (
+    (1, "Create users, organizations, namespaces and vectors", (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS organizations (
+            organization_id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            user_id INTEGER REFERENCES users(user_id),
+            UNIQUE(name, user_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS namespaces (
+            namespace_id SERIAL PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            user_id INTEGER REFERENCES users(user_id),
+            organization_id INTEGER REFERENCES organizations(organization_id),
+            UNIQUE(name, organization_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vectors (
+            vector_id SERIAL PRIMARY KEY,
+            original_text TEXT NOT NULL,
+            text TEXT NOT NULL,
+            embedding FLOAT[] NOT NULL,
+            user_id INTEGER REFERENCES users(user_id),
+            organization_id INTEGER REFERENCES organizations(organization_id),
+            namespace_id INTEGER REFERENCES namespaces(namespace_id)
+        )
+        """,
+    )),
+    (2, "Add the scalar-quantized embedding columns", (
+        """
+        ALTER TABLE vectors
+            ADD COLUMN IF NOT EXISTS embedding_format VARCHAR(16),
+            ADD COLUMN IF NOT EXISTS embedding_codes BYTEA,
+            ADD COLUMN IF NOT EXISTS embedding_scale REAL,
+            ADD COLUMN IF NOT EXISTS embedding_offset REAL
+        """,
+    )),
+    (3, "Add the norm of write-time normalized embeddings", (
+        "ALTER TABLE vectors ADD COLUMN IF NOT EXISTS embedding_norm REAL",
+    )),
+    (4, "Index the foreign keys that reads and deletes filter on", (
+        "CREATE INDEX IF NOT EXISTS vectors_namespace_id_idx ON vectors (namespace_id)",
+        "CREATE INDEX IF NOT EXISTS vectors_user_id_idx ON vectors (user_id)",
+        "CREATE INDEX IF NOT EXISTS vectors_organization_id_idx ON vectors (organization_id)",
+        "CREATE INDEX IF NOT EXISTS namespaces_user_id_idx ON namespaces (user_id)",
+        "CREATE INDEX IF NOT EXISTS namespaces_organization_id_idx ON namespaces (organization_id)",
+        "CREATE INDEX IF NOT EXISTS organizations_user_id_idx ON organizations (user_id)",
+    )),
+    (5, "Tombstone deleted namespaces and let their vectors outlive them until compaction", (
+        "ALTER TABLE vectors DROP CONSTRAINT IF EXISTS vectors_user_id_fkey",
+        "ALTER TABLE vectors DROP CONSTRAINT IF EXISTS vectors_organization_id_fkey",
+        "ALTER TABLE vectors DROP CONSTRAINT IF EXISTS vectors_namespace_id_fkey",
+        """
+        CREATE TABLE IF NOT EXISTS namespace_tombstones (
+            namespace_id INTEGER PRIMARY KEY,
+            deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+    )),
+    (6, "Track the live vector set and segment generation of replaced namespaces", (
+        """
+        ALTER TABLE namespaces
+            ADD COLUMN IF NOT EXISTS first_vector_id INTEGER NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS segment_generation INTEGER NOT NULL DEFAULT 0
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS replaced_namespaces (
+            namespace_id INTEGER PRIMARY KEY,
+            first_vector_id INTEGER NOT NULL,
+            replaced_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+    )),
+    (7, "Store texts once per content, compressed, in a table keyed by their SHA-256", (
+        """
+        CREATE TABLE IF NOT EXISTS texts (
+            text_hash BYTEA PRIMARY KEY,
+            codec VARCHAR(8) NOT NULL,
+            content BYTEA NOT NULL
+        )
+        """,
+        # Already compressed; TOAST would only spend CPU trying again
+        "ALTER TABLE texts ALTER COLUMN content SET STORAGE EXTERNAL",
+        """
+        ALTER TABLE vectors
+            ADD COLUMN IF NOT EXISTS text_hash BYTEA,
+            ADD COLUMN IF NOT EXISTS original_text_hash BYTEA,
+            ALTER COLUMN text DROP NOT NULL,
+            ALTER COLUMN original_text DROP NOT NULL
+        """,
+        "CREATE INDEX IF NOT EXISTS vectors_text_hash_idx ON vectors (text_hash)",
+        "CREATE INDEX IF NOT EXISTS vectors_original_text_hash_idx ON vectors (original_text_hash)",
+    )),
+    (8, "Track the committed rows of segment-backed namespaces", (
+        # NULL for namespaces written before; their whole segment is committed
+        "ALTER TABLE namespaces ADD COLUMN IF NOT EXISTS segment_rows BIGINT",
+        "ALTER TABLE namespaces ALTER COLUMN segment_rows SET DEFAULT 0",
+    )),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Arbitrary key of the Postgres advisory lock serializing migrations across miner processes
+_MIGRATION_LOCK_KEY = 0x7665637472  # "vectr"
+
+# Databases already migrated by this process
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+
+def migrate(db_name: str, conn) -> int:
+    """
+    Brings the database schema up to SCHEMA_VERSION, once per database per process.
+
+    Pending migrations run in order, each in its own transaction together with its row in
+    schema_migrations, under an advisory lock so concurrent miners never apply one twice.
+
+    Args:
+        db_name (str): Name of the database, for the per-process guard.
+        conn: An autocommit connection to the database.
+
+    Returns:
+        int: The number of migrations applied.
+    """
+    if db_name in _migrated:
+        return 0
+    with _migrated_lock:
+        if db_name in _migrated:
+            return 0
+        applied = 0
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (_MIGRATION_LOCK_KEY,))
+            try:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_migrations (
+                        version INTEGER PRIMARY KEY,
+                        description TEXT NOT NULL,
+                        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    )
+                """)
+                cur.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+                current_version = cur.fetchone()[0]
+                for version, description, statements in MIGRATIONS:
+                    if version <= current_version:
+                        continue
+                    cur.execute("BEGIN")
+                    try:
+                        for statement in statements:
+                            cur.execute(statement)
+                        cur.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)", (version, description))
+                        cur.execute("COMMIT")
+                    except Exception:
+                        cur.execute("ROLLBACK")
+                        raise
+                    bt.logging.info(f"Applied migration {version} to '{db_name}': {description}")
+                    applied += 1
+            finally:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (_MIGRATION_LOCK_KEY,))
+        _migrated.add(db_name)
+        return applied
@@ -1,29 +1,254 @@
+import functools
 import psycopg2
+import psycopg2.extras
 from psycopg2 import sql
 from typing import List, Tuple, Optional
 import bittensor as bt
 from dotenv import load_dotenv
 import os
+import numpy as np
+from vectornet.search_engine import index_registry, lexical_registry
+from vectornet.database_manage.connection_pool import get_pool
+from vectornet.database_manage import migrations
+from vectornet.database_manage.segment_store import SegmentStore
+from vectornet.database_manage.namespace_vectors import NamespaceVectors
+from vectornet.database_manage.pgvector_namespace import PgvectorNamespace, vector_literals
+from vectornet.database_manage.streaming_namespace import StreamingNamespace, streaming_threshold
+from vectornet.database_manage.indexed_namespace import IndexedNamespace
+from vectornet.database_manage.embedding_cache import embedding_cache
+from vectornet.database_manage.name_cache import name_cache
+from vectornet.database_manage.storage_backend import MinerStorage
+from vectornet.database_manage import compactor
+from vectornet.database_manage.text_store import TEXT_COLUMNS, TEXT_JOINS, encode_text, row_texts, stored_text, text_blobs, text_hash
+from vectornet.search_engine.quantization import QuantizedEmbeddings, EMBEDDING_FORMATS
 
 load_dotenv()
-db_user_name = os.getenv("POSTGRESQL_USER_NAME")
-password = os.getenv("POSTGRES_PASSWORD")
-db_port = os.getenv("DB_PORT")
+# 'postgres' keeps embeddings in the vectors table, 'segment' in memory-mapped files (see SegmentStore)
+embedding_storage = os.getenv("MINER_EMBEDDING_STORAGE", "postgres").lower()
+# How embeddings are encoded in the vectors table: 'float32' (raw bytea), 'float' (FLOAT[]), 'float16' or 'int8' codes
+embedding_format = os.getenv("MINER_EMBEDDING_FORMAT", "float32").lower()
+if embedding_format not in EMBEDDING_FORMATS:
+    raise ValueError(f"MINER_EMBEDDING_FORMAT must be one of {EMBEDDING_FORMATS}, got '{embedding_format}'")
+# 'local' searches namespaces in process (cache, ANN and BM25 indexes), 'pgvector' inside Postgres
+search_backend = os.getenv("MINER_SEARCH_BACKEND", "local").lower()
+if search_backend not in ('local', 'pgvector'):
+    raise ValueError(f"MINER_SEARCH_BACKEND must be 'local' or 'pgvector', got '{search_backend}'")
+# Index type of the pgvector backend: 'hnsw' or 'ivfflat' (build ivfflat once the table holds data)
+pgvector_index = os.getenv("MINER_PGVECTOR_INDEX", "hnsw").lower()
+pgvector_lists = int(os.getenv("MINER_PGVECTOR_LISTS", 100))
+# Also keep embeddings in a pgvector column when the extension is installed
+pgvector_enabled = os.getenv("MINER_PGVECTOR", "false").lower() in ("1", "true", "yes") or search_backend == 'pgvector'
+embedding_dim = int(os.getenv("MINER_EMBEDDING_DIM", 768))
+# Rows per multi-row INSERT statement of add_vectors
+insert_page_size = int(os.getenv("MINER_INSERT_PAGE_SIZE", 500))
 
+# Arbitrary key of the advisory lock between text writers (shared) and the blob garbage collection of compact (exclusive)
+_TEXT_STORE_LOCK_KEY = 0x7465787473  # "texts"
 
-class MinerDBManager:
+# Databases this process has seen exist, so later requests skip the pg_database lookup
+_known_databases = set()
+# Databases checked for pgvector, and those that have the embedding_vector column
+_pgvector_checked = set()
+_pgvector_databases = set()
+# Databases whose rows stored before pgvector was enabled have their embedding_vector filled in,
+# so pgvector searches see every vector; the others are searched locally until then
+_pgvector_backfilled = set()
+
+# Rows whose embedding is in the vectors table but not yet in its pgvector column
+_MISSING_EMBEDDING_VECTOR = "embedding_vector IS NULL AND (embedding_format IS NOT NULL OR cardinality(embedding) > 0)"
+
+
+def decode_embeddings(rows):
+    """
+    Decode vectors rows into one float32 matrix, whatever formats they were stored in.
+
+    Args:
+        rows (list): (embedding, embedding_format, embedding_codes, embedding_scale, embedding_offset)
+            column values of every row.
+
+    Returns:
+        np.ndarray: A (len(rows), dim) float32 matrix. Raw float32 rows are read with np.frombuffer;
+        only legacy FLOAT[] rows are built from Python lists.
+    """
+    if not rows:
+        return np.empty((0, 0), dtype=np.float32)
+    positions_by_format = {}
+    for position, row in enumerate(rows):
+        positions_by_format.setdefault(row[1] or 'float', []).append(position)
+    if list(positions_by_format) == ['float32']:
+        return decode_float32([row[2] for row in rows])
+
+    matrix = None
+    for stored_format, positions in positions_by_format.items():
+        if stored_format == 'float':
+            block = np.array([rows[position][0] for position in positions], dtype=np.float32)
+        elif stored_format == 'float32':
+            block = decode_float32([rows[position][2] for position in positions])
+        else:
+            block = QuantizedEmbeddings.from_rows(
+                stored_format, *zip(*[rows[position][2:5] for position in positions])
+            ).dequantize()
+        if matrix is None:
+            matrix = np.empty((len(rows), block.shape[1]), dtype=np.float32)
+        matrix[positions] = block
+    return matrix
+
+
+def decode_float32(codes):
+    """Decode raw little-endian float32 embeddings (one bytea per row) with a single np.frombuffer."""
+    return np.frombuffer(b''.join(codes), dtype='<f4').reshape(len(codes), -1)
+
+
+def encode_embeddings(embeddings, stored_format: str):
+    """
+    Encode float embeddings for the vectors table.
+
+    Returns:
+        tuple: The (embedding, embedding_format, embedding_codes, embedding_scale, embedding_offset)
+        column values of every embedding, and the QuantizedEmbeddings they were built from (None
+        unless the format is quantized).
+    """
+    if stored_format in (None, 'float'):
+        return [(np.asarray(embedding, dtype=np.float64).tolist(), None, None, None, None) for embedding in embeddings], None
+    if stored_format == 'float32':
+        matrix = np.asarray(embeddings, dtype='<f4')
+        return [([], 'float32', psycopg2.Binary(row.tobytes()), 1.0, 0.0) for row in matrix.reshape(len(matrix), -1)], None
+    quantized = QuantizedEmbeddings.quantize(embeddings, stored_format)
+    columns = [
+        ([], stored_format, psycopg2.Binary(quantized.row_bytes(position)), float(quantized.scales[position]), float(quantized.offsets[position]))
+        for position in range(len(quantized))
+    ]
+    return columns, quantized
+
+
+def normalize_embeddings(embeddings):
+    """Return the L2-normalized float32 embeddings and their original norms."""
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    matrix = matrix.reshape(matrix.shape[0], -1)
+    norms = np.linalg.norm(matrix, axis=1)
+    return matrix / np.where(norms == 0, 1.0, norms)[:, None], norms
+
+
+def list_validator_databases() -> List[str]:
+    """List the miner's per-validator databases (every non-system database)."""
+    with get_pool('postgres').connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT datname
+                FROM pg_database
+                WHERE datistemplate = false AND datname != 'postgres';
+            """)
+            return [row[0] for row in cur.fetchall()]
+
+
+def read_namespace_texts(db_name: str, namespace_id: int):
+    """
+    Read the (vector_ids, texts) of a namespace on a connection borrowed for the call, so lexical
+    indexes can be built from a background thread.
+    """
+    with get_pool(db_name).connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT v.vector_id, v.text, tt.codec, tt.content
+                FROM vectors v JOIN namespaces n USING (namespace_id)
+                LEFT JOIN texts tt ON tt.text_hash = v.text_hash
+                WHERE v.namespace_id = %s AND v.vector_id >= n.first_vector_id
+            """, (namespace_id,))
+            rows = cur.fetchall()
+    return [row[0] for row in rows], [stored_text(*row[1:4]) for row in rows]
+
+
+def read_embeddings(db_name: str, namespace_id: int, vector_ids: List[int]):
+    """
+    Read the embeddings of the given vectors of a namespace from the vectors table on a
+    connection borrowed for the call, for the re-rank of an IndexedNamespace. Ids of other
+    namespaces are ignored.
+
+    Returns:
+        tuple: (vector_ids, (n, dim) float32 matrix) of the ids found.
+    """
+    with get_pool(db_name).connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                SELECT embedding, vector_id, embedding_format, embedding_codes, embedding_scale, embedding_offset
+                FROM vectors
+                WHERE vector_id = ANY(%s) AND namespace_id = %s
+            """, (list(vector_ids), namespace_id))
+            rows = cur.fetchall()
+    return [row[1] for row in rows], decode_embeddings([(row[0], *row[2:6]) for row in rows])
+
+
+def store_texts(cur, texts: List[str]) -> List[bytes]:
+    """
+    Write the texts missing from the content-addressed text store and return the hash of every text.
+
+    Must run inside the caller's transaction, which it makes hold the text store lock in shared
+    mode, so compact cannot collect a blob between this lookup and the commit of the rows
+    referencing it. Texts already stored, by any namespace of the database, are neither
+    compressed nor sent again.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock_shared(%s)", (_TEXT_STORE_LOCK_KEY,))
+    blobs = text_blobs(texts)
+    if blobs:
+        cur.execute("SELECT text_hash FROM texts WHERE text_hash = ANY(%s)", (list(blobs),))
+        for row in cur.fetchall():
+            blobs.pop(bytes(row[0]), None)
+    if blobs:
+        psycopg2.extras.execute_values(
+            cur,
+            "INSERT INTO texts (text_hash, codec, content) VALUES %s ON CONFLICT (text_hash) DO NOTHING",
+            [(digest, *encode_text(text)) for digest, text in blobs.items()],
+            page_size=insert_page_size,
+        )
+    return [text_hash(text) for text in texts]
+
+
+def prepare_validator_databases():
+    """
+    Startup pass over every validator database: apply its pending schema migrations, then
+    normalize the embeddings it stored before write-time normalization, move the texts it
+    stored inline into the text store and fill in the pgvector column of rows stored before
+    pgvector was enabled.
+    """
+    try:
+        db_names = list_validator_databases()
+    except Exception as e:
+        bt.logging.error(f"Error listing validator databases: {e}")
+        return
+    for db_name in db_names:
+        try:
+            manager = MinerDBManager(db_name)
+            manager.normalize_stored_embeddings()
+            manager.migrate_texts()
+            manager.backfill_pgvector()
+        except Exception as e:
+            bt.logging.error(f"Error preparing database '{db_name}': {e}")
+
+
+def pooled(method):
+    """Return the connection the method borrowed through connect_to_db to the pool once it finishes."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        borrowed = self.conn is None
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if borrowed:
+                self.close_connection()
+    return wrapper
+
+
+class MinerDBManager(MinerStorage):
     def __init__(self, validator_hotkey: str):
         """Initialize MinerDBManager with a validator hotkey."""
-        self.db_name = validator_hotkey
+        super().__init__(validator_hotkey)
         self.conn = None
 
     def ensure_database_exists(self) -> bool:
         """Ensure the database exists, create if not."""
-        # Create the connection
-        conn = psycopg2.connect(dbname='postgres', user=db_user_name, password=password, host='localhost', port=db_port)
-        # Set autocommit before creating the cursor
-        conn.autocommit = True
-        try:
+        if self.db_name in _known_databases:
+            return True
+        with get_pool('postgres').connection() as conn:
             with conn.cursor() as cur:
                 # Check if the database exists
                 cur.execute(sql.SQL("SELECT 1 FROM pg_database WHERE datname = %s"), [self.db_name])
@@ -32,58 +257,75 @@ class MinerDBManager:
                 # If it doesn't exist, create it
                 if not exists:
                     cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(self.db_name)))
-                    return False
-                return True
-        finally:
-            conn.close()  # Ensure the connection is closed properly
+                _known_databases.add(self.db_name)
+                return bool(exists)
 
     def connect_to_db(self):
-        """Connect to the specified database."""
-        self.conn = psycopg2.connect(dbname=self.db_name, user=db_user_name, password=password, host='localhost', port=db_port)
-        self.conn.autocommit = True  # Ensure autocommit is enabled
-
-    def create_tables(self):
-        """Create tables if they do not exist."""
-        commands = (
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                user_id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL UNIQUE
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS organizations (
-                organization_id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                user_id INTEGER REFERENCES users(user_id),
-                UNIQUE(name, user_id)
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS namespaces (
-                namespace_id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                user_id INTEGER REFERENCES users(user_id),
-                organization_id INTEGER REFERENCES organizations(organization_id),
-                UNIQUE(name, organization_id)
-            )
-            """,
-            """
-            CREATE TABLE IF NOT EXISTS vectors (
-                vector_id SERIAL PRIMARY KEY,
-                original_text TEXT NOT NULL,
-                text TEXT NOT NULL,
-                embedding FLOAT[] NOT NULL,
-                user_id INTEGER REFERENCES users(user_id),
-                organization_id INTEGER REFERENCES organizations(organization_id),
-                namespace_id INTEGER REFERENCES namespaces(namespace_id)
-            )
-            """,
-        )
-        with self.conn.cursor() as cur:
-            for command in commands:
-                cur.execute(command)
-            self.conn.commit()
+        """Borrow a connection to the specified database from its pool, unless one is already held."""
+        if self.conn is None:
+            self.conn = get_pool(self.db_name).getconn()
+
+    def ensure_schema(self):
+        """Apply the pending schema migrations, once per database per process (see migrations.py)."""
+        self.connect_to_db()
+        migrations.migrate(self.db_name, self.conn)
+        if pgvector_enabled and self.db_name not in _pgvector_checked:
+            self.enable_pgvector()
+
+    def enable_pgvector(self):
+        """Add the pgvector embedding_vector column, if the extension can be installed in this database."""
+        try:
+            with self.conn.cursor() as cur:
+                cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
+                cur.execute(sql.SQL("ALTER TABLE vectors ADD COLUMN IF NOT EXISTS embedding_vector vector({})").format(sql.Literal(embedding_dim)))
+                if search_backend == 'pgvector':
+                    if pgvector_index == 'ivfflat':
+                        cur.execute(sql.SQL(
+                            "CREATE INDEX IF NOT EXISTS vectors_embedding_vector_idx ON vectors USING ivfflat (embedding_vector vector_cosine_ops) WITH (lists = {})"
+                        ).format(sql.Literal(pgvector_lists)))
+                    else:
+                        cur.execute("CREATE INDEX IF NOT EXISTS vectors_embedding_vector_idx ON vectors USING hnsw (embedding_vector vector_cosine_ops)")
+                cur.execute(f"SELECT EXISTS (SELECT 1 FROM vectors WHERE {_MISSING_EMBEDDING_VECTOR})")
+                if not cur.fetchone()[0]:
+                    _pgvector_backfilled.add(self.db_name)
+            _pgvector_databases.add(self.db_name)
+        except Exception as e:
+            bt.logging.warning(f"pgvector is not available in '{self.db_name}', embeddings are stored as bytea only: {e}")
+        _pgvector_checked.add(self.db_name)
+
+    def uses_pgvector(self) -> bool:
+        """Whether this database keeps embeddings in the pgvector embedding_vector column too."""
+        return self.db_name in _pgvector_databases
+
+    def resolve_ids(self, user_name: str, organization_name: Optional[str] = None, namespace_name: Optional[str] = None) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """
+        Resolve user, organization and namespace names to their ids.
+
+        Names are served from the process-wide name cache; on a miss all of them are looked up
+        with one joined query instead of a query per level.
+
+        Returns:
+            tuple: (user_id, organization_id, namespace_id). An id is None when that level does not
+            exist or was not asked for.
+        """
+        names = (user_name, organization_name, namespace_name)
+        if None in names:
+            names = names[:names.index(None)]
+        cached = name_cache.get(self.db_name, names)
+        if cached is None:
+            generation = name_cache.generation(self.db_name)
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    SELECT u.user_id, o.organization_id, n.namespace_id
+                    FROM users u
+                    LEFT JOIN organizations o ON o.user_id = u.user_id AND o.name = %(organization)s
+                    LEFT JOIN namespaces n ON n.organization_id = o.organization_id AND n.user_id = u.user_id AND n.name = %(namespace)s
+                    WHERE u.name = %(user)s
+                """, {'user': user_name, 'organization': organization_name, 'namespace': namespace_name})
+                row = cur.fetchone()
+            cached = row[:len(names)] if row else (None,) * len(names)
+            name_cache.put(self.db_name, names, cached, generation)
+        return tuple(cached) + (None,) * (3 - len(cached))
 
     def get_user_id(self, name: str) -> Optional[int]:
         """Retrieve user ID by name."""
@@ -146,22 +388,112 @@ class MinerDBManager:
             self.conn.commit()
         return namespace_id
 
-    def add_vectors(self, user_id: int, organization_id: int, namespace_id: int, vectors: List[dict]) -> List[int]:
-        """Add vectors to the database and return the list of newly added vector IDs."""
-        vector_ids = []  # List to store the IDs of newly added vectors
+    def add_vectors(self, user_id: int, organization_id: int, namespace_id: int, vectors: List[dict], replace: bool = False) -> List[int]:
+        """
+        Add vectors to the database and return the list of newly added vector IDs.
+
+        With `replace`, the vectors become the namespace's whole vector set in the same transaction:
+        the namespace's first_vector_id moves past every older row, which reads stop seeing at
+        commit and compact deletes later, and segment-backed namespaces get a new segment
+        generation. Reads in flight keep the old set, including its texts, until they finish.
+
+        Segment appends are made before the commit and counted in namespaces.segment_rows by the
+        same transaction, so reads only see the first segment_rows rows of the segment; a tail
+        left by a rollback or a crash is cut off by the next write.
+        """
+        if not vectors and not replace:
+            return []
+        cache_key = (self.db_name, namespace_id)
+        use_segment = SegmentStore(self.db_name, namespace_id).namespace_exists()
+        # Stored embeddings are unit length, so reads rank them with a plain inner product
+        if vectors:
+            embeddings, norms = normalize_embeddings([vector['embedding'] for vector in vectors])
+        else:
+            embeddings, norms = np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.float32)
+        if use_segment or not vectors:
+            # Segment-backed namespaces keep only text and metadata in Postgres
+            columns, quantized = [([], None, None, None, None)] * len(vectors), None
+        else:
+            columns, quantized = encode_embeddings(embeddings, embedding_format)
+
         with self.conn.cursor() as cur:
-            for vector in vectors:
-                cur.execute(
-                    "INSERT INTO vectors (text, embedding, user_id, organization_id, namespace_id, original_text) VALUES (%s, %s, %s, %s, %s, %s) RETURNING vector_id",
-                    (vector['text'], vector['embedding'], user_id, organization_id, namespace_id, vector['original_text'])
-                )
-                vector_id = cur.fetchone()[0]  # Fetch the newly created vector_id
-                vector_ids.append(vector_id)  # Add it to the list
-            self.conn.commit()
-        bt.logging.debug("success creating vectors")
+            # One transaction of multi-row inserts instead of a round trip per vector
+            cur.execute("BEGIN")
+            try:
+                # Serializes writes to the namespace, so a replace sees every row written before it
+                cur.execute("SELECT segment_generation, segment_rows FROM namespaces WHERE namespace_id = %s FOR UPDATE", (namespace_id,))
+                generation, segment_rows = cur.fetchone()
+                # Read under the lock, so a replace that committed before it shows up as a mismatch
+                cache_generation, cache_version = embedding_cache.generation(cache_key), embedding_cache.version(cache_key)
+                hashes = store_texts(cur, [vector['text'] for vector in vectors] + [vector['original_text'] for vector in vectors])
+                text_hashes, original_text_hashes = hashes[:len(vectors)], hashes[len(vectors):]
+                # Ids are drawn up front and inserted explicitly, so they follow the input order
+                # no matter how Postgres orders the rows of a multi-row insert
+                cur.execute("SELECT nextval(pg_get_serial_sequence('vectors', 'vector_id')) FROM generate_series(1, %s)", (max(len(vectors), 1),))
+                drawn_ids = [row[0] for row in cur.fetchall()]
+                vector_ids = drawn_ids[:len(vectors)]
+                rows = [
+                    (vector_id, hashes[0], *stored, norm, user_id, organization_id, namespace_id, hashes[1])
+                    for vector_id, hashes, stored, norm in zip(vector_ids, zip(text_hashes, original_text_hashes), columns, norms.tolist())
+                ]
+                insert_columns = "vector_id, text_hash, embedding, embedding_format, embedding_codes, embedding_scale, embedding_offset, embedding_norm, user_id, organization_id, namespace_id, original_text_hash"
+                if self.uses_pgvector() and not use_segment:
+                    insert_columns += ", embedding_vector"
+                    rows = [row + (literal,) for row, literal in zip(rows, vector_literals(embeddings))]
+                if rows:
+                    psycopg2.extras.execute_values(
+                        cur,
+                        f"INSERT INTO vectors ({insert_columns}) VALUES %s",
+                        rows,
+                        page_size=insert_page_size,
+                    )
+                if replace:
+                    # Every older row of the namespace has a smaller id than the first drawn one
+                    first_vector_id = drawn_ids[0]
+                    if use_segment:
+                        dim = embeddings.shape[1] if len(vectors) else SegmentStore(self.db_name, namespace_id, generation=generation).dim()
+                        generation += 1
+                        SegmentStore(self.db_name, namespace_id, generation=generation).create(dim)
+                    segment_rows = 0
+                    cur.execute(
+                        "UPDATE namespaces SET first_vector_id = %s, segment_generation = %s, segment_rows = 0 WHERE namespace_id = %s",
+                        (first_vector_id, generation, namespace_id),
+                    )
+                    cur.execute("""
+                        INSERT INTO replaced_namespaces (namespace_id, first_vector_id) VALUES (%s, %s)
+                        ON CONFLICT (namespace_id) DO UPDATE SET first_vector_id = EXCLUDED.first_vector_id, replaced_at = now()
+                    """, (namespace_id, first_vector_id))
+                if use_segment and vectors:
+                    segment_store = SegmentStore(self.db_name, namespace_id, generation=generation)
+                    if segment_rows is None:
+                        segment_rows = len(segment_store.load()[0])
+                    segment_store.truncate(segment_rows)
+                    segment_store.append(vector_ids, embeddings)
+                    cur.execute("UPDATE namespaces SET segment_rows = %s WHERE namespace_id = %s", (segment_rows + len(vector_ids), namespace_id))
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
+
+        if replace:
+            embedding_cache.replace(cache_key, vector_ids, quantized if quantized is not None else embeddings, normalized=True, version=cache_version)
+            # The indexes are rebuilt from the new set by the next reads
+            index_registry.drop_indexes(self.db_name, [namespace_id])
+            lexical_registry.drop_indexes(self.db_name, [namespace_id])
+            if use_segment:
+                # The previous generation stays for reads that resolved it just before the commit
+                SegmentStore(self.db_name, namespace_id).remove_generations_below(generation - 1)
+            compactor.schedule(self.db_name)
+        else:
+            # Indexes first: a read snapshotting the cache in between then finds them ahead, not behind
+            index_registry.add_vectors(self.db_name, namespace_id, vector_ids, embeddings)
+            embedding_cache.extend(cache_key, vector_ids, quantized if quantized is not None else embeddings, generation=cache_generation)
+            lexical_registry.add_texts(self.db_name, namespace_id, vector_ids, [vector['text'] for vector in vectors])
+        bt.logging.debug(f"success creating {len(vector_ids)} vectors")
         return vector_ids  # Return the list of vector IDs
 
 
+    @pooled
     def create_operation(self, request_type: str, user_name: str, organization_name: str, namespace_name: str, texts: List[str], embeddings: List[List[float]], original_texts: List[str]):
         """Handle create operations."""
         if request_type.lower() != 'create':
@@ -169,11 +501,17 @@ class MinerDBManager:
 
         self.ensure_database_exists()
         self.connect_to_db()
-        self.create_tables()
+        self.ensure_schema()
 
-        user_id = self.add_user(user_name)
-        organization_id = self.add_organization(user_id, organization_name)
+        user_id, organization_id, _ = self.resolve_ids(user_name, organization_name)
+        if user_id is None:
+            user_id = self.add_user(user_name)
+        if organization_id is None:
+            organization_id = self.add_organization(user_id, organization_name)
         namespace_id = self.add_namespace(user_id, organization_id, namespace_name)
+        name_cache.put(self.db_name, (user_name, organization_name, namespace_name), (user_id, organization_id, namespace_id))
+        if embedding_storage == 'segment' and embeddings:
+            SegmentStore(self.db_name, namespace_id).create(len(embeddings[0]))
 
         vectors = [
             {'original_text': original_text, 'text': text, 'embedding': embedding}
@@ -183,6 +521,7 @@ class MinerDBManager:
         bt.logging.debug("Success Create Operation.")
         return user_id, organization_id, namespace_id, vector_ids
 
+    @pooled
     def read_operation(self, request_type: str, user_name: str, organization_name: str, namespace_name: str) -> List[Tuple]:
         """Handle read operations."""
         if request_type.lower() != 'read':
@@ -192,36 +531,315 @@ class MinerDBManager:
             raise Exception(f"Validator '{self.db_name}' has no saved data.")
 
         self.connect_to_db()
+        self.ensure_schema()
 
-        user_id = self.get_user_id(user_name)
+        user_id, organization_id, namespace_id = self.resolve_ids(user_name, organization_name, namespace_name)
         if user_id is None:
             raise Exception(f"User '{user_name}' does not exist.")
 
-        organization_id = self.get_organization_id(user_id, organization_name)
         if organization_id is None:
             raise Exception(f"Organization '{organization_name}' does not exist for user '{user_name}'.")
 
-        namespace_id = self.get_namespace_id(user_id, organization_id, namespace_name)
         if namespace_id is None:
             raise Exception(f"Namespace '{namespace_name}' does not exist for user '{user_name}' and organization '{organization_name}'.")
 
+        use_segment = SegmentStore(self.db_name, namespace_id).namespace_exists()
+        # Until backfill_pgvector is done, older rows are missing from the pgvector column, so the search stays local
+        if search_backend == 'pgvector' and self.db_name in _pgvector_backfilled and not use_segment:
+            # Searched in Postgres; nothing but the namespace size is read here
+            vectors = PgvectorNamespace(self.db_name, namespace_id, self.count_vectors(namespace_id))
+            bt.logging.debug("Success Read Operation (pgvector).")
+            return user_id, organization_id, namespace_id, vectors
+
+        cache_key = (self.db_name, namespace_id)
+        search_index, _, indexed_size = index_registry.get_index_with_pending(self.db_name, namespace_id) if index_registry.index_type == 'ivfpq' else (None, [], 0)
+        if search_index is not None:
+            # Searched through its IVF-PQ codes; only the candidates of the re-rank are read back
+            embedding_cache.discard(cache_key)
+            if use_segment:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT segment_generation, segment_rows FROM namespaces WHERE namespace_id = %s", (namespace_id,))
+                    generation, segment_rows = cur.fetchone()
+                fetch_embeddings = functools.partial(SegmentStore(self.db_name, namespace_id, generation=generation).fetch, rows=segment_rows)
+            else:
+                fetch_embeddings = functools.partial(read_embeddings, self.db_name, namespace_id)
+            vectors = IndexedNamespace(search_index, fetch_embeddings, indexed_size)
+        else:
+            vectors = embedding_cache.get(cache_key)
+        if vectors is None:
+            # A write committing while this loads makes the put a no-op instead of caching a stale snapshot
+            cache_version = embedding_cache.version(cache_key)
+            if use_segment:
+                with self.conn.cursor() as cur:
+                    cur.execute("SELECT segment_generation, segment_rows FROM namespaces WHERE namespace_id = %s", (namespace_id,))
+                    generation, segment_rows = cur.fetchone()
+                segment_store = SegmentStore(self.db_name, namespace_id, generation=generation)
+                vector_ids, embeddings = segment_store.load()
+                if segment_rows is not None:
+                    # Rows past segment_rows belong to a write that has not committed
+                    vector_ids, embeddings = vector_ids[:segment_rows], embeddings[:segment_rows]
+                # Texts stay in Postgres until hydrate_vectors asks for the winners
+                vectors = NamespaceVectors(vector_ids, embeddings, normalized=segment_store.is_normalized())
+            else:
+                vector_count = self.count_vectors(namespace_id)
+                if streaming_threshold and vector_count >= streaming_threshold:
+                    # Scanned chunk by chunk at search time instead of being loaded
+                    bt.logging.debug(f"Success Read Operation (streaming {vector_count} vectors).")
+                    return user_id, organization_id, namespace_id, StreamingNamespace(self.db_name, namespace_id, vector_count)
+                vectors = self.read_postgres_vectors(namespace_id)
+            embedding_cache.put(cache_key, vectors.vector_ids, vectors.embeddings, vectors.normalized, version=cache_version)
+        if len(vectors) >= lexical_registry.lexical_threshold:
+            lexical_registry.ensure_index(self.db_name, namespace_id, len(vectors), lambda: read_namespace_texts(self.db_name, namespace_id))
+
+        bt.logging.debug(f"Success Read Operation. Embedding cache: {embedding_cache.stats()}")
+        return user_id, organization_id, namespace_id, vectors
+
+    def count_vectors(self, namespace_id: int) -> int:
+        """Count the live vectors of a namespace."""
         with self.conn.cursor() as cur:
             cur.execute("""
-                SELECT original_text, text, embedding, vector_id
-                FROM vectors
-                WHERE namespace_id = %s
+                SELECT count(*)
+                FROM vectors v JOIN namespaces n USING (namespace_id)
+                WHERE v.namespace_id = %s AND v.vector_id >= n.first_vector_id
+            """, (namespace_id,))
+            return cur.fetchone()[0]
+
+    def read_postgres_vectors(self, namespace_id: int) -> NamespaceVectors:
+        """
+        Read the ids and embeddings of every vector of a namespace whose embeddings are stored in
+        the vectors table. Texts are left out; hydrate_vectors fetches them for the winners only.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                SELECT v.embedding, v.vector_id, v.embedding_format, v.embedding_codes, v.embedding_scale, v.embedding_offset, v.embedding_norm
+                FROM vectors v JOIN namespaces n USING (namespace_id)
+                WHERE v.namespace_id = %s AND v.vector_id >= n.first_vector_id
             """, (namespace_id,))
             
             rows = cur.fetchall()
-            
-            vectors = [
-                {'original_text': row[0], 'text': row[1], 'embedding': row[2], 'vector_id': row[3]}
-                for row in rows
-            ]
-            bt.logging.debug("Success Read Operation.")
-            return user_id, organization_id, namespace_id, vectors
 
+        stored_formats = {row[2] or 'float' for row in rows}
+        if len(stored_formats) == 1 and stored_formats <= {'float16', 'int8'}:
+            # Keep a uniformly quantized namespace compact in memory
+            embeddings = QuantizedEmbeddings.from_rows(stored_formats.pop(), [row[3] for row in rows], [row[4] for row in rows], [row[5] for row in rows])
+        else:
+            embeddings = decode_embeddings([(row[0], *row[2:6]) for row in rows])
+        normalized = all(row[6] is not None for row in rows)
+        return NamespaceVectors([row[1] for row in rows], embeddings, normalized=normalized)
+
+    @pooled
+    def migrate_embeddings(self, batch_size: int = 1000) -> int:
+        """
+        Re-encode the stored embeddings of this database into the configured MINER_EMBEDDING_FORMAT.
+
+        Rows are converted in batches, each committed on its own, so the migration can be stopped
+        and resumed. Segment-backed rows (no embedding in Postgres) are left alone.
+        Returns the number of converted rows.
+        """
+        self.connect_to_db()
+        self.ensure_schema()
+        converted = 0
+        migrated_namespace_ids = set()
+        use_pgvector = self.uses_pgvector()
+        while True:
+            with self.conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT vector_id, namespace_id, embedding, embedding_format, embedding_codes, embedding_scale, embedding_offset
+                    FROM vectors
+                    WHERE (COALESCE(embedding_format, 'float') <> %s {"OR embedding_vector IS NULL" if use_pgvector else ""})
+                        AND (embedding_format IS NOT NULL OR cardinality(embedding) > 0)
+                    LIMIT %s
+                """, (embedding_format, batch_size))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+
+                embeddings = decode_embeddings([row[2:7] for row in rows])
+                columns, _ = encode_embeddings(embeddings, embedding_format)
+                if use_pgvector:
+                    # Also fills the pgvector column of rows stored before it was enabled
+                    updates = [(*stored, literal, row[0]) for stored, literal, row in zip(columns, vector_literals(embeddings), rows)]
+                else:
+                    updates = [(*stored, row[0]) for stored, row in zip(columns, rows)]
+                psycopg2.extras.execute_batch(cur, f"""
+                    UPDATE vectors
+                    SET embedding = %s, embedding_format = %s, embedding_codes = %s, embedding_scale = %s, embedding_offset = %s
+                        {", embedding_vector = %s" if use_pgvector else ""}
+                    WHERE vector_id = %s
+                """, updates)
+                self.conn.commit()
+
+            converted += len(rows)
+            migrated_namespace_ids.update(row[1] for row in rows)
+
+        for namespace_id in migrated_namespace_ids:
+            embedding_cache.invalidate((self.db_name, namespace_id))
+        if use_pgvector:
+            _pgvector_backfilled.add(self.db_name)
+        bt.logging.info(f"Migrated {converted} embeddings of '{self.db_name}' to the '{embedding_format}' format.")
+        return converted
 
+    @pooled
+    def backfill_pgvector(self, batch_size: int = 1000) -> int:
+        """
+        Fill in the pgvector embedding_vector column of the rows stored before it was enabled.
+
+        Batches commit on their own, so the backfill can run in the background and resume after a
+        restart; pgvector searches of the database start once it is done.
+        Returns the number of filled rows.
+        """
+        self.connect_to_db()
+        self.ensure_schema()
+        if not self.uses_pgvector():
+            return 0
+        filled = 0
+        while True:
+            with self.conn.cursor() as cur:
+                cur.execute(f"""
+                    SELECT vector_id, embedding, embedding_format, embedding_codes, embedding_scale, embedding_offset
+                    FROM vectors
+                    WHERE {_MISSING_EMBEDDING_VECTOR}
+                    LIMIT %s
+                """, (batch_size,))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+
+                embeddings = decode_embeddings([row[1:6] for row in rows])
+                psycopg2.extras.execute_batch(
+                    cur,
+                    "UPDATE vectors SET embedding_vector = %s WHERE vector_id = %s",
+                    list(zip(vector_literals(embeddings), [row[0] for row in rows])),
+                )
+                self.conn.commit()
+            filled += len(rows)
+
+        _pgvector_backfilled.add(self.db_name)
+        if filled:
+            bt.logging.info(f"Filled the pgvector column of {filled} vectors of '{self.db_name}'.")
+        return filled
+
+    @pooled
+    def normalize_stored_embeddings(self, batch_size: int = 1000) -> int:
+        """
+        Backfill write-time normalization for embeddings stored before it existed.
+
+        Postgres rows get their embedding rescaled to unit length (re-encoded in their own format)
+        and their norm recorded; segments are normalized in place. Batches commit on their own, so
+        the backfill can run in the background and resume after a restart.
+        Returns the number of normalized rows.
+        """
+        self.connect_to_db()
+        self.ensure_schema()
+        normalized = 0
+        normalized_namespace_ids = set()
+        while True:
+            with self.conn.cursor() as cur:
+                cur.execute("""
+                    SELECT vector_id, namespace_id, embedding, embedding_format, embedding_codes, embedding_scale, embedding_offset
+                    FROM vectors
+                    WHERE embedding_norm IS NULL
+                        AND (embedding_format IS NOT NULL OR cardinality(embedding) > 0)
+                    LIMIT %s
+                """, (batch_size,))
+                rows = cur.fetchall()
+                if not rows:
+                    break
+
+                embeddings, norms = normalize_embeddings(decode_embeddings([row[2:7] for row in rows]))
+                updates = []
+                for stored_format in {row[3] for row in rows}:
+                    positions = [position for position, row in enumerate(rows) if row[3] == stored_format]
+                    columns, _ = encode_embeddings(embeddings[positions], stored_format)
+                    updates.extend((*stored, float(norms[position]), rows[position][0]) for stored, position in zip(columns, positions))
+                psycopg2.extras.execute_batch(cur, """
+                    UPDATE vectors
+                    SET embedding = %s, embedding_format = %s, embedding_codes = %s, embedding_scale = %s, embedding_offset = %s, embedding_norm = %s
+                    WHERE vector_id = %s
+                """, updates)
+                self.conn.commit()
+
+            normalized += len(rows)
+            normalized_namespace_ids.update(row[1] for row in rows)
+
+        for namespace_id in SegmentStore.list_namespace_ids(self.db_name):
+            vector_ids, norms = SegmentStore(self.db_name, namespace_id).normalize()
+            if len(vector_ids) == 0:
+                continue
+            with self.conn.cursor() as cur:
+                psycopg2.extras.execute_batch(
+                    cur,
+                    "UPDATE vectors SET embedding_norm = %s WHERE vector_id = %s AND embedding_norm IS NULL",
+                    list(zip(norms.tolist(), vector_ids.tolist())),
+                )
+                self.conn.commit()
+            normalized += len(vector_ids)
+            normalized_namespace_ids.add(namespace_id)
+
+        # Cached entries were loaded without the flag; drop them so reads pick up the inner product path
+        for namespace_id in normalized_namespace_ids:
+            embedding_cache.invalidate((self.db_name, namespace_id))
+        if normalized:
+            bt.logging.info(f"Normalized {normalized} stored embeddings of '{self.db_name}'.")
+        return normalized
+
+    @pooled
+    def migrate_texts(self, batch_size: int = 1000) -> int:
+        """
+        Move the texts of rows stored before the text store into it, in batches that each commit
+        on their own, so the backfill can be stopped and resumed.
+        Returns the number of moved rows.
+        """
+        self.connect_to_db()
+        self.ensure_schema()
+        moved = 0
+        while True:
+            with self.conn.cursor() as cur:
+                cur.execute("BEGIN")
+                try:
+                    cur.execute("""
+                        SELECT vector_id, text, original_text FROM vectors
+                        WHERE text_hash IS NULL AND text IS NOT NULL
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    """, (batch_size,))
+                    rows = cur.fetchall()
+                    if rows:
+                        hashes = store_texts(cur, [row[1] for row in rows] + [row[2] for row in rows])
+                        psycopg2.extras.execute_batch(cur, """
+                            UPDATE vectors SET text_hash = %s, original_text_hash = %s, text = NULL, original_text = NULL
+                            WHERE vector_id = %s
+                        """, [(hashes[i], hashes[len(rows) + i], row[0]) for i, row in enumerate(rows)])
+                    cur.execute("COMMIT")
+                except Exception:
+                    cur.execute("ROLLBACK")
+                    raise
+            if not rows:
+                break
+            moved += len(rows)
+
+        if moved:
+            bt.logging.info(f"Moved {moved} texts of '{self.db_name}' to the text store.")
+        return moved
+
+    @pooled
+    def hydrate_vectors(self, vectors: List[dict]) -> List[dict]:
+        """Fill in 'original_text' and 'text' of the given vector dictionaries that were read without them."""
+        missing_ids = [vector['vector_id'] for vector in vectors if vector.get('original_text') is None]
+        if not missing_ids:
+            return vectors
+
+        self.connect_to_db()
+        with self.conn.cursor() as cur:
+            cur.execute(f"SELECT v.vector_id, {TEXT_COLUMNS} FROM vectors v {TEXT_JOINS} WHERE v.vector_id = ANY(%s)", (missing_ids,))
+            texts = {row[0]: row_texts(row[1:7]) for row in cur.fetchall()}
+
+        for vector in vectors:
+            if vector['vector_id'] in texts:
+                vector['original_text'], vector['text'] = texts[vector['vector_id']]
+        return vectors
+
+    @pooled
     def update_operation(self, request_type: str, perform: str, user_name: str, organization_name: str, namespace_name: str, texts: List[str], embeddings: List[List[float]], original_texts):
         """Handle update operations."""
         if request_type.lower() != 'update':
@@ -231,16 +849,15 @@ class MinerDBManager:
             raise Exception(f"Validator '{self.db_name}' has no saved data.")
 
         self.connect_to_db()
+        self.ensure_schema()
 
-        user_id = self.get_user_id(user_name)
+        user_id, organization_id, namespace_id = self.resolve_ids(user_name, organization_name, namespace_name)
         if user_id is None:
             raise Exception(f"User '{user_name}' does not exist.")
 
-        organization_id = self.get_organization_id(user_id, organization_name)
         if organization_id is None:
             raise Exception(f"Organization '{organization_name}' does not exist for user '{user_name}'.")
 
-        namespace_id = self.get_namespace_id(user_id, organization_id, namespace_name)
         if namespace_id is None:
             raise Exception(f"Namespace '{namespace_name}' does not exist for user '{user_name}' and organization '{organization_name}'.")
 
@@ -248,70 +865,166 @@ class MinerDBManager:
             {'original_text': original_text, 'text': text, 'embedding': embedding}
             for original_text, text, embedding in zip(original_texts, texts, embeddings)
         ]
-        
-        if perform == 'replace':
-            # cur.execute("DELETE FROM vectors WHERE namespace_id = %s", (namespace_id,))
-            # self.conn.commit()
-            pass
-        
-        vector_ids = self.add_vectors(user_id, organization_id, namespace_id, vectors)
+        vector_ids = self.add_vectors(user_id, organization_id, namespace_id, vectors, replace=(perform == 'replace'))
         bt.logging.debug("Success Update Operation.")
         
         return user_id, organization_id, namespace_id, vector_ids
 
+    @pooled
     def delete_operation(self, request_type: str, perform: str, user_name: Optional[str] = None, organization_name: Optional[str] = None, namespace_name: Optional[str] = None):
-        """Handle delete operations."""
+        """
+        Handle delete operations.
+
+        Deletes are logical: the namespaces go from the small metadata tables and get a tombstone,
+        in one transaction whose cost does not depend on how many vectors they hold. Their vector
+        rows can no longer be reached by any read and are removed later by compact.
+        """
         if request_type.lower() != 'delete':
             raise ValueError("Invalid request type. Must be 'delete'.")
 
         if perform not in {'user', 'organization', 'namespace'}:
             raise ValueError("Invalid perform action. Must be 'user', 'organization', or 'namespace'.")
 
+        if perform == 'user':
+            if not user_name:
+                raise ValueError("User name is required for user deletion.")
+            deleted_names = (user_name,)
+        elif perform == 'organization':
+            if not user_name or not organization_name:
+                raise ValueError("User and organization names are required for organization deletion.")
+            deleted_names = (user_name, organization_name)
+        else:
+            if not user_name or not organization_name or not namespace_name:
+                raise ValueError("User, organization, and namespace names are required for namespace deletion.")
+            deleted_names = (user_name, organization_name, namespace_name)
+
         if not self.ensure_database_exists():
             raise Exception(f"Validator '{self.db_name}' has no saved data.")
 
         self.connect_to_db()
+        self.ensure_schema()
 
+        user_id, organization_id, namespace_id = self.resolve_ids(*deleted_names)
+        if perform == 'user' and user_id is None:
+            raise Exception(f"User '{user_name}' does not exist.")
+        if perform == 'organization' and organization_id is None:
+            raise Exception(f"Organization '{organization_name}' does not exist for user '{user_name}'.")
+        if perform == 'namespace' and namespace_id is None:
+            raise Exception(f"Namespace '{namespace_name}' does not exist for user '{user_name}' and organization '{organization_name}'.")
+
+        # The deepest level that was named decides which rows go
+        column, value = {
+            'user': ('user_id', user_id), 'organization': ('organization_id', organization_id), 'namespace': ('namespace_id', namespace_id),
+        }[perform]
         with self.conn.cursor() as cur:
-            if perform == 'user':
-                if not user_name:
-                    raise ValueError("User name is required for user deletion.")
-                user_id = self.get_user_id(user_name)
-                if user_id is None:
-                    raise Exception(f"User '{user_name}' does not exist.")
-                cur.execute("DELETE FROM vectors WHERE user_id = %s", (user_id,))
-                cur.execute("DELETE FROM namespaces WHERE user_id = %s", (user_id,))
-                cur.execute("DELETE FROM organizations WHERE user_id = %s", (user_id,))
-                cur.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
-
-            elif perform == 'organization':
-                if not user_name or not organization_name:
-                    raise ValueError("User and organization names are required for organization deletion.")
-                user_id = self.get_user_id(user_name)
-                organization_id = self.get_organization_id(user_id, organization_name)
-                if organization_id is None:
-                    raise Exception(f"Organization '{organization_name}' does not exist for user '{user_name}'.")
-                cur.execute("DELETE FROM vectors WHERE organization_id = %s", (organization_id,))
-                cur.execute("DELETE FROM namespaces WHERE organization_id = %s", (organization_id,))
-                cur.execute("DELETE FROM organizations WHERE organization_id = %s", (organization_id,))
-
-            elif perform == 'namespace':
-                if not user_name or not organization_name or not namespace_name:
-                    raise ValueError("User, organization, and namespace names are required for namespace deletion.")
-                user_id = self.get_user_id(user_name)
-                organization_id = self.get_organization_id(user_id, organization_name)
-                namespace_id = self.get_namespace_id(user_id, organization_id, namespace_name)
-                if namespace_id is None:
-                    raise Exception(f"Namespace '{namespace_name}' does not exist for user '{user_name}' and organization '{organization_name}'.")
-                cur.execute("DELETE FROM vectors WHERE namespace_id = %s", (namespace_id,))
-                cur.execute("DELETE FROM namespaces WHERE namespace_id = %s", (namespace_id,))
+            cur.execute("BEGIN")
+            try:
+                cur.execute(sql.SQL("""
+                    INSERT INTO namespace_tombstones (namespace_id)
+                    SELECT namespace_id FROM namespaces WHERE {} = %s
+                    ON CONFLICT DO NOTHING
+                    RETURNING namespace_id
+                """).format(sql.Identifier(column)), (value,))
+                deleted_namespace_ids = [row[0] for row in cur.fetchall()]
+                cur.execute(sql.SQL("DELETE FROM namespaces WHERE {} = %s").format(sql.Identifier(column)), (value,))
+                if perform in ('user', 'organization'):
+                    cur.execute(sql.SQL("DELETE FROM organizations WHERE {} = %s").format(sql.Identifier(column)), (value,))
+                if perform == 'user':
+                    cur.execute("DELETE FROM users WHERE user_id = %s", (user_id,))
+                cur.execute("COMMIT")
+            except Exception:
+                cur.execute("ROLLBACK")
+                raise
 
-            self.conn.commit()
-            
+        name_cache.invalidate(self.db_name, deleted_names)
+        index_registry.drop_indexes(self.db_name, deleted_namespace_ids)
+        lexical_registry.drop_indexes(self.db_name, deleted_namespace_ids)
+        for deleted_namespace_id in deleted_namespace_ids:
+            embedding_cache.invalidate((self.db_name, deleted_namespace_id))
+            SegmentStore(self.db_name, deleted_namespace_id).remove()
+        compactor.schedule(self.db_name)
         bt.logging.debug("Success Delete Operation")
         return user_id, organization_id, namespace_id
 
+    @pooled
+    def compact(self, batch_rows: int, should_continue=lambda: True) -> bool:
+        """
+        Physically remove the vector rows of tombstoned namespaces and the rows that replaces
+        superseded, in batches of `batch_rows` deletes that each commit on their own together with
+        the text blobs no row references anymore, then VACUUM the vectors and texts tables.
+
+        Args:
+            should_continue (callable): Checked before every batch; compaction stops early when it
+                returns False, e.g. because the miner stopped being idle.
+
+        Returns:
+            bool: True once no tombstone is left, False if it stopped early.
+        """
+        self.connect_to_db()
+        self.ensure_schema()
+        reclaimed = 0
+        with self.conn.cursor() as cur:
+            cur.execute("SELECT namespace_id FROM namespace_tombstones ORDER BY deleted_at")
+            namespace_ids = [row[0] for row in cur.fetchall()]
+            for namespace_id in namespace_ids:
+                while True:
+                    if not should_continue():
+                        return False
+                    deleted = self.delete_vector_batch(cur, "namespace_id = %s", (namespace_id,), batch_rows)
+                    reclaimed += deleted
+                    if deleted < batch_rows:
+                        break
+                cur.execute("DELETE FROM namespace_tombstones WHERE namespace_id = %s", (namespace_id,))
+
+            cur.execute("SELECT namespace_id, first_vector_id FROM replaced_namespaces ORDER BY replaced_at")
+            for namespace_id, first_vector_id in cur.fetchall():
+                while True:
+                    if not should_continue():
+                        return False
+                    deleted = self.delete_vector_batch(cur, "namespace_id = %s AND vector_id < %s", (namespace_id, first_vector_id), batch_rows)
+                    reclaimed += deleted
+                    if deleted < batch_rows:
+                        break
+                # A replace committed meanwhile keeps its own, newer entry
+                cur.execute("DELETE FROM replaced_namespaces WHERE namespace_id = %s AND first_vector_id = %s", (namespace_id, first_vector_id))
+            if reclaimed:
+                # Plain VACUUM makes the space reusable without locking out readers
+                cur.execute("VACUUM vectors")
+                cur.execute("VACUUM texts")
+                bt.logging.info(f"Compacted {reclaimed} deleted vectors of '{self.db_name}'.")
+        return True
+
+    def delete_vector_batch(self, cur, condition: str, params: tuple, batch_rows: int) -> int:
+        """
+        Delete up to `batch_rows` vector rows matching `condition`, and the text blobs only they
+        referenced, in one transaction. Returns the number of deleted rows.
+        """
+        cur.execute("BEGIN")
+        try:
+            cur.execute(f"""
+                DELETE FROM vectors
+                WHERE ctid = ANY(ARRAY(SELECT ctid FROM vectors WHERE {condition} LIMIT %s))
+                RETURNING text_hash, original_text_hash
+            """, (*params, batch_rows))
+            rows = cur.fetchall()
+            hashes = list({bytes(digest) for row in rows for digest in row if digest is not None})
+            if hashes:
+                # Waits for writers that may be committing rows referencing these blobs
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (_TEXT_STORE_LOCK_KEY,))
+                cur.execute("""
+                    DELETE FROM texts t
+                    WHERE t.text_hash = ANY(%s)
+                        AND NOT EXISTS (SELECT 1 FROM vectors WHERE text_hash = t.text_hash)
+                        AND NOT EXISTS (SELECT 1 FROM vectors WHERE original_text_hash = t.text_hash)
+                """, (hashes,))
+            cur.execute("COMMIT")
+        except Exception:
+            cur.execute("ROLLBACK")
+            raise
+        return len(rows)
+
     def close_connection(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
+        """Return the database connection to its pool."""
+        if self.conn is not None:
+            get_pool(self.db_name).putconn(self.conn)
+            self.conn = None
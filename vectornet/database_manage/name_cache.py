@@ -0,0 +1,60 @@
+import threading
+from collections import defaultdict
+
+
+class NameCache:
+    """
+    Ids of resolved (user, organization, namespace) names, per validator database.
+
+    Keys are name prefixes: (user,), (user, organization) and (user, organization, namespace), so
+    a cached namespace also answers user and organization lookups. Only names that exist are
+    cached; since ids are never reused, an entry can only go stale through a delete, which drops
+    every entry under the deleted prefix. Each database has a generation bumped by deletes, and a
+    lookup that started before a delete cannot put the ids it read back into the cache.
+    """
+
+    def __init__(self):
+        self._entries = defaultdict(dict)
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def get(self, db_name: str, names: tuple):
+        """Returns the ids of the names, or None if they are not cached."""
+        with self._lock:
+            return self._entries[db_name].get(names)
+
+    def generation(self, db_name: str) -> int:
+        """The current generation of the database, to hand back to put."""
+        with self._lock:
+            return self._generations[db_name]
+
+    def put(self, db_name: str, names: tuple, ids: tuple, generation: int = None):
+        """
+        Caches the ids of the names and of their prefixes, ignoring None ids.
+
+        Args:
+            generation (int): The generation read before the ids were looked up; the put is dropped
+                if a delete happened since. None when the caller itself holds the only reference
+                to the ids, e.g. right after inserting them.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generations[db_name]:
+                return
+            entries = self._entries[db_name]
+            for length in range(1, len(names) + 1):
+                prefix_ids = ids[:length]
+                if prefix_ids[-1] is None:
+                    break
+                entries[names[:length]] = prefix_ids
+
+    def invalidate(self, db_name: str, names: tuple):
+        """Drops the entries of the names and of everything under them."""
+        with self._lock:
+            self._generations[db_name] += 1
+            entries = self._entries[db_name]
+            for key in [key for key in entries if key[:len(names)] == names]:
+                del entries[key]
+
+
+# Shared by every MinerDBManager of the process.
+name_cache = NameCache()
@@ -0,0 +1,45 @@
+from collections.abc import Sequence
+import numpy as np
+
+
+class NamespaceVectors(Sequence):
+    """
+    The vectors of a namespace as returned by MinerDBManager.read_operation.
+
+    Holds the namespace's vector ids and embeddings as one id array and one (n, dim) float32
+    matrix, so the search engine can score them directly. Indexing still yields the usual vector
+    dictionaries, built on demand; their texts are only present when the read already had them,
+    otherwise MinerDBManager.hydrate_vectors fetches them for the winners.
+    """
+
+    def __init__(self, vector_ids, embeddings, texts=None, normalized=False):
+        """
+        Args:
+            vector_ids: (n,) array of vector ids.
+            embeddings: (n, dim) float32 matrix aligned with vector_ids.
+            texts (list, optional): (original_text, text) pairs aligned with vector_ids.
+            normalized (bool): Whether every row was L2-normalized at write time, so that
+                cosine similarity reduces to a plain inner product.
+        """
+        self.vector_ids = np.asarray(vector_ids, dtype=np.int64)
+        self.embeddings = embeddings
+        self.texts = texts
+        self.normalized = normalized
+
+    def __len__(self):
+        return self.vector_ids.shape[0]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        vector = {'vector_id': int(self.vector_ids[position]), 'embedding': self.embeddings[position]}
+        if self.texts is not None:
+            vector['original_text'], vector['text'] = self.texts[position]
+        return vector
+
+    def positions(self, vector_ids):
+        """Returns the positions of the given vector ids, in the given order, skipping unknown ids."""
+        wanted = np.asarray(vector_ids, dtype=np.int64)
+        found = np.flatnonzero(np.isin(self.vector_ids, wanted))
+        position_by_id = dict(zip(self.vector_ids[found].tolist(), found.tolist()))
+        return [position_by_id[vector_id] for vector_id in wanted.tolist() if vector_id in position_by_id]
@@ -0,0 +1,79 @@
+import os
+import numpy as np
+import bittensor as bt
+from dotenv import load_dotenv
+from vectornet.database_manage.connection_pool import get_pool
+from vectornet.database_manage.text_store import TEXT_COLUMNS, TEXT_JOINS, row_texts
+
+load_dotenv()
+pgvector_ef_search = int(os.getenv("MINER_PGVECTOR_EF_SEARCH", 100))
+pgvector_probes = int(os.getenv("MINER_PGVECTOR_PROBES", 10))
+# Lets an HNSW scan keep going until LIMIT rows of the namespace are found (pgvector >= 0.8)
+pgvector_iterative_scan = os.getenv("MINER_PGVECTOR_ITERATIVE_SCAN", "relaxed_order")
+
+
+def vector_literals(embeddings):
+    """Text literals of the embeddings for a pgvector column."""
+    return ['[' + ','.join(map(repr, embedding)) + ']' for embedding in np.asarray(embeddings, dtype=np.float32).tolist()]
+
+
+class PgvectorNamespace:
+    """
+    A namespace searched inside Postgres through the pgvector index on vectors.embedding_vector.
+
+    MinerDBManager.read_operation returns it instead of NamespaceVectors when MINER_SEARCH_BACKEND
+    is 'pgvector'. SearchEngine hands it the queries, and only the top rows of every query, texts
+    included, leave the database.
+    """
+
+    def __init__(self, db_name: str, namespace_id: int, size: int):
+        self.db_name = db_name
+        self.namespace_id = namespace_id
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def search_batch(self, query_embeddings, sizes):
+        """
+        Finds the nearest vectors of every query by cosine distance.
+
+        Returns:
+            list: For every query, its top vectors as search result dictionaries, best first.
+        """
+        results = []
+        with get_pool(self.db_name).connection() as conn:
+            with conn.cursor() as cur:
+                self.configure(cur)
+                for literal, size in zip(vector_literals(query_embeddings), sizes):
+                    # Only the texts of the LIMIT winners are fetched and decompressed
+                    cur.execute(f"""
+                        SELECT v.vector_id, v.embedding_vector::real[], 1 - v.distance, {TEXT_COLUMNS}
+                        FROM (
+                            SELECT v.*, v.embedding_vector <=> %(query)s::vector AS distance
+                            FROM vectors v JOIN namespaces n USING (namespace_id)
+                            WHERE v.namespace_id = %(namespace_id)s AND v.embedding_vector IS NOT NULL
+                                AND v.vector_id >= n.first_vector_id
+                            ORDER BY v.embedding_vector <=> %(query)s::vector
+                            LIMIT %(size)s
+                        ) v
+                        {TEXT_JOINS}
+                        ORDER BY v.distance
+                    """, {'query': literal, 'namespace_id': self.namespace_id, 'size': size})
+                    hits = []
+                    for row in cur.fetchall():
+                        original_text, text = row_texts(row[3:9])
+                        hits.append({'original_text': original_text, 'text': text, 'embedding': row[1], 'vector_id': row[0], 'similarity': float(row[2])})
+                    results.append(hits)
+        return results
+
+    def configure(self, cur):
+        """Sets the index search parameters on the borrowed connection."""
+        global pgvector_iterative_scan
+        cur.execute("SELECT set_config('hnsw.ef_search', %s, false), set_config('ivfflat.probes', %s, false)", (str(pgvector_ef_search), str(pgvector_probes)))
+        if pgvector_iterative_scan:
+            try:
+                cur.execute("SELECT set_config('hnsw.iterative_scan', %s, false)", (pgvector_iterative_scan,))
+            except Exception as e:
+                bt.logging.warning(f"Disabling pgvector iterative scans, unsupported by this server: {e}")
+                pgvector_iterative_scan = ''
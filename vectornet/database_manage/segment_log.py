@@ -0,0 +1,162 @@
+import os
+import struct
+import threading
+import zlib
+import numpy as np
+import bittensor as bt
+from dotenv import load_dotenv
+
+load_dotenv()
+# The log is checkpointed (segment files fsynced, log emptied) once it grows past this size
+segment_log_max_bytes = int(os.getenv("MINER_SEGMENT_LOG_MAX_BYTES", 64 * 1024 * 1024))
+
+# Record: <payload length, crc32 of the payload> then the payload
+# <namespace_id, segment generation, first row, rows, dim> + int64 vector ids + float32 embeddings
+_HEADER = struct.Struct("<II")
+_PAYLOAD_HEADER = struct.Struct("<qIqII")
+
+
+class SegmentLog:
+    """
+    Checksummed write-ahead log of the segment appends of one validator.
+
+    SegmentStore.append writes a record here before touching the namespace's segment files, and
+    returns once the record is on disk. Concurrent appends share fsyncs (group commit): the first
+    writer to wait becomes the leader and syncs everything written so far, and the writers that
+    queued behind it return without a sync of their own. The segment files themselves are only
+    fsynced at checkpoints, after which the log starts empty.
+
+    Opening the log replays it: every intact record whose rows are not in its segment at the row
+    they were written to is written there again, and a torn or corrupt tail is cut off. Replaying
+    by position keeps a tail the database never committed (which the next write truncates) from
+    ending up between committed rows.
+
+    Layout: <segment root>/<validator hotkey>/segment.log
+    """
+
+    def __init__(self, root: str, validator_hotkey: str, max_bytes: int = segment_log_max_bytes):
+        self.root = root
+        self.validator_hotkey = validator_hotkey
+        self.path = os.path.join(root, validator_hotkey, "segment.log")
+        self.max_bytes = max_bytes
+        # Held while a record is written and applied, so segment files follow log order
+        self.lock = threading.Lock()
+        self._sync_condition = threading.Condition()
+        # Logical log positions: bytes ever written, bytes known durable, and _written at the
+        # last checkpoint; they keep growing across checkpoints so waiting writers never go back
+        self._written = 0
+        self._synced = 0
+        self._checkpointed = 0
+        self._syncing = False
+        self._dirty_paths = set()  # Segment files appended since the last checkpoint
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        self._recover()
+
+    def append(self, store, vector_ids, embeddings):
+        """Logs rows of a SegmentStore, writes them to its files and waits until the log record is durable."""
+        vector_ids = np.asarray(vector_ids, dtype="<i8")
+        embeddings = np.asarray(embeddings, dtype="<f4").reshape(len(vector_ids), -1)
+        with self.lock:
+            payload = _PAYLOAD_HEADER.pack(store.namespace_id, store.generation, store.rows(), len(vector_ids), embeddings.shape[1]) + vector_ids.tobytes() + embeddings.tobytes()
+            record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+            os.write(self._fd, record)
+            with self._sync_condition:
+                self._written += len(record)
+                offset = self._written
+            self._dirty_paths.update(store.write_rows(vector_ids, embeddings))
+        self.sync(offset)
+        if offset - self._checkpointed > self.max_bytes:
+            self.checkpoint()
+
+    def sync(self, offset: int):
+        """Returns once the log is on disk up to `offset`, fsyncing for every writer waiting meanwhile."""
+        with self._sync_condition:
+            while self._synced < offset:
+                if self._syncing:
+                    self._sync_condition.wait()
+                    continue
+                self._syncing = True
+                target = self._written
+                self._sync_condition.release()
+                try:
+                    os.fsync(self._fd)
+                finally:
+                    self._sync_condition.acquire()
+                    self._syncing = False
+                    self._sync_condition.notify_all()
+                self._synced = max(self._synced, target)
+
+    def checkpoint(self, force: bool = False):
+        """Makes the segment files durable and empties the log."""
+        with self.lock:
+            if not force and self._written - self._checkpointed <= self.max_bytes:
+                return  # Another writer checkpointed first
+            for file_path in self._dirty_paths:
+                try:
+                    with open(file_path, "rb+") as f:
+                        os.fsync(f.fileno())
+                except FileNotFoundError:
+                    pass  # The namespace was deleted
+            self._dirty_paths.clear()
+            os.ftruncate(self._fd, 0)
+            os.fsync(self._fd)
+            with self._sync_condition:
+                self._synced = max(self._synced, self._written)
+                self._checkpointed = self._written
+                self._sync_condition.notify_all()
+
+    def _recover(self):
+        from vectornet.database_manage.segment_store import SegmentStore
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+        offset, replayed = 0, 0
+        while offset + _HEADER.size <= len(data):
+            length, checksum = _HEADER.unpack_from(data, offset)
+            payload = data[offset + _HEADER.size:offset + _HEADER.size + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                break
+            namespace_id, generation, first_row, rows, dim = _PAYLOAD_HEADER.unpack_from(payload)
+            vector_ids = np.frombuffer(payload, dtype="<i8", count=rows, offset=_PAYLOAD_HEADER.size)
+            embeddings = np.frombuffer(payload, dtype="<f4", count=rows * dim, offset=_PAYLOAD_HEADER.size + 8 * rows).reshape(rows, dim)
+            store = SegmentStore(self.validator_hotkey, namespace_id, root=self.root, generation=generation)
+            # Deleted namespaces and retired generations have no segment left to replay into
+            if store.exists():
+                stored_ids, _ = store.load(recover=False)
+                # A crash in the middle of a write can leave one file longer than the other
+                store.truncate(len(stored_ids), recover=False)
+                if not np.array_equal(stored_ids[first_row:first_row + rows], vector_ids):
+                    # Later records rewrite whatever follows, in log order
+                    store.truncate(min(first_row, len(stored_ids)), recover=False)
+                    store.write_rows(vector_ids, embeddings)
+                    replayed += rows
+                self._dirty_paths.update((store.embeddings_path, store.vector_ids_path))
+            offset += _HEADER.size + length
+
+        if offset < len(data):
+            bt.logging.warning(f"Dropping {len(data) - offset} bytes of torn segment log tail of '{self.validator_hotkey}'")
+            os.ftruncate(self._fd, offset)
+        if replayed:
+            bt.logging.info(f"Replayed {replayed} vectors from the segment log of '{self.validator_hotkey}'")
+        self._written = self._synced = offset
+        if offset:
+            # Replayed rows are made durable before new writes arrive
+            self.checkpoint(force=True)
+
+
+# Open logs keyed by (segment root, validator hotkey); opening one replays it.
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_log(root: str, validator_hotkey: str) -> SegmentLog:
+    """Returns the segment log of a validator, recovering it on first use in this process."""
+    key = (root, validator_hotkey)
+    log = _logs.get(key)
+    if log is None:
+        with _logs_lock:
+            log = _logs.get(key)
+            if log is None:
+                log = _logs[key] = SegmentLog(root, validator_hotkey)
+    return log
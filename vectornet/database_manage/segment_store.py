@@ -0,0 +1,208 @@
+import os
+import json
+import shutil
+import numpy as np
+from dotenv import load_dotenv
+from vectornet.database_manage.segment_log import get_log
+
+load_dotenv()
+segment_dir = os.path.expanduser(os.getenv("MINER_SEGMENT_DIR", "~/.vectornet/segments"))
+
+
+class SegmentStore:
+    """
+    Append-only columnar embedding segment of one namespace.
+
+    Embeddings live in a raw little-endian float32 file and their vector ids in a parallel int64
+    file, so a read is a zero-copy np.memmap instead of parsing FLOAT[] rows out of Postgres.
+    Appends go through the validator's SegmentLog, which makes them durable with group-committed
+    fsyncs of one log file and replays them after a crash.
+
+    A replace writes the new vector set as the next generation of the segment, next to the
+    current one; the database row of the namespace records which generation is live, so readers
+    switch over atomically when the replace commits.
+    Layout: <segment_dir>/<validator hotkey>/<namespace_id>/{segment.json, embeddings.f32, vector_ids.i64}
+    for generation 0, and segment.<generation>.json etc. for later ones.
+    """
+
+    def __init__(self, validator_hotkey: str, namespace_id: int, root: str = None, generation: int = 0):
+        self.root = root or segment_dir
+        self.validator_hotkey = validator_hotkey
+        self.namespace_id = namespace_id
+        self.generation = generation
+        self.path = os.path.join(self.root, validator_hotkey, str(namespace_id))
+        suffix = f".{generation}" if generation else ""
+        self.meta_path = os.path.join(self.path, f"segment{suffix}.json")
+        self.embeddings_path = os.path.join(self.path, f"embeddings{suffix}.f32")
+        self.vector_ids_path = os.path.join(self.path, f"vector_ids{suffix}.i64")
+
+    @staticmethod
+    def list_namespace_ids(validator_hotkey: str, root: str = None):
+        """Returns the ids of the namespaces of a validator that have a segment."""
+        path = os.path.join(root or segment_dir, validator_hotkey)
+        if not os.path.isdir(path):
+            return []
+        return [int(name) for name in os.listdir(path) if name.isdigit()]
+
+    def exists(self) -> bool:
+        return os.path.exists(self.meta_path)
+
+    def namespace_exists(self) -> bool:
+        """Whether the namespace keeps its embeddings in segments, whatever generation is live."""
+        return os.path.isdir(self.path)
+
+    def create(self, dim: int):
+        """Starts an empty segment generation, discarding any leftover files (of every generation for a new namespace)."""
+        if self.generation == 0:
+            self.remove()
+        else:
+            self._remove_files(self.generation)
+        os.makedirs(self.path, exist_ok=True)
+        for file_path in (self.embeddings_path, self.vector_ids_path):
+            open(file_path, "wb").close()
+        self._write_meta({"dim": dim, "normalized": True})
+
+    def _read_meta(self) -> dict:
+        with open(self.meta_path) as f:
+            return json.load(f)
+
+    def _write_meta(self, meta: dict):
+        temp_path = self.meta_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.meta_path)
+        # The new directory entries must survive a crash before the database points at them
+        directory = os.open(self.path, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def dim(self) -> int:
+        return self._read_meta()["dim"]
+
+    def is_normalized(self) -> bool:
+        """Whether every embedding of the segment is L2-normalized (segments created before that was done are not)."""
+        return self._read_meta().get("normalized", False)
+
+    def normalize(self):
+        """
+        L2-normalizes the segment's embeddings in place and marks it normalized.
+
+        Returns:
+            tuple: (vector_ids, norms) of the rows that were rescaled.
+        """
+        meta = self._read_meta()
+        vector_ids, _ = self.load()
+        if meta.get("normalized", False) or len(vector_ids) == 0:
+            return np.empty(0, dtype="<i8"), np.empty(0, dtype=np.float32)
+
+        # Cosine similarity is scale invariant, so readers racing with the rewrite still rank correctly
+        embeddings = np.memmap(self.embeddings_path, dtype="<f4", mode="r+", shape=(len(vector_ids), meta["dim"]))
+        norms = np.linalg.norm(embeddings, axis=1)
+        embeddings /= np.where(norms == 0, 1.0, norms)[:, None]
+        embeddings.flush()
+        del embeddings
+        meta["normalized"] = True
+        self._write_meta(meta)
+        return np.array(vector_ids), norms
+
+    def append(self, vector_ids, embeddings):
+        """Appends embeddings and their ids, returning once they are durable in the segment log."""
+        matrix = np.asarray(embeddings, dtype="<f4").reshape(len(vector_ids), self.dim())
+        get_log(self.root, self.validator_hotkey).append(self, vector_ids, matrix)
+
+    def write_rows(self, vector_ids, embeddings):
+        """
+        Writes rows to the segment files without syncing them; called by SegmentLog.
+        Embeddings are written first so ids never point past them.
+
+        Returns:
+            tuple: The paths of the files written.
+        """
+        for file_path, data in (
+            (self.embeddings_path, np.asarray(embeddings, dtype="<f4")),
+            (self.vector_ids_path, np.asarray(vector_ids, dtype="<i8")),
+        ):
+            with open(file_path, "ab") as f:
+                f.write(data.tobytes())
+        return self.embeddings_path, self.vector_ids_path
+
+    def rows(self) -> int:
+        """Rows in the vector id file, committed or not."""
+        return os.path.getsize(self.vector_ids_path) // 8
+
+    def truncate(self, rows: int, recover: bool = True):
+        """
+        Cuts both files back to their first `rows` rows, dropping a tail whose write was never
+        committed. The log is replayed first, as in `load`, so it cannot bring the tail back.
+        """
+        if recover:
+            get_log(self.root, self.validator_hotkey)
+        dim = self.dim()
+        for file_path, row_size in ((self.embeddings_path, 4 * dim), (self.vector_ids_path, 8)):
+            if os.path.getsize(file_path) > rows * row_size:
+                with open(file_path, "r+b") as f:
+                    f.truncate(rows * row_size)
+                    os.fsync(f.fileno())
+
+    def load(self, recover: bool = True):
+        """
+        Maps the segment into memory without copying it, after replaying the validator's segment
+        log if this process has not opened it yet (SegmentLog turns that off while replaying).
+
+        Returns:
+            tuple: (vector_ids, embeddings) as read-only memmaps of shape (n,) and (n, dim).
+        """
+        if recover:
+            get_log(self.root, self.validator_hotkey)
+        dim = self.dim()
+        rows = min(
+            os.path.getsize(self.vector_ids_path) // 8,
+            os.path.getsize(self.embeddings_path) // (4 * dim),
+        )
+        if rows == 0:
+            return np.empty(0, dtype="<i8"), np.empty((0, dim), dtype="<f4")
+        vector_ids = np.memmap(self.vector_ids_path, dtype="<i8", mode="r", shape=(rows,))
+        embeddings = np.memmap(self.embeddings_path, dtype="<f4", mode="r", shape=(rows, dim))
+        return vector_ids, embeddings
+
+    def fetch(self, vector_ids, rows: int = None):
+        """
+        Reads the embeddings of the given ids, touching only their pages of the segment; rows past
+        `rows` (a tail not yet committed) are ignored. Ids are appended in increasing order.
+
+        Returns:
+            tuple: (vector_ids, embeddings) of the ids found, in segment order.
+        """
+        stored_ids, embeddings = self.load()
+        if rows is not None:
+            stored_ids, embeddings = stored_ids[:rows], embeddings[:rows]
+        wanted = np.unique(np.asarray(vector_ids, dtype=np.int64))
+        positions = np.minimum(np.searchsorted(stored_ids, wanted), max(len(stored_ids) - 1, 0))
+        if len(stored_ids):
+            positions = positions[stored_ids[positions] == wanted]
+        else:
+            positions = positions[:0]
+        return np.array(stored_ids[positions]), np.array(embeddings[positions], dtype=np.float32)
+
+    def remove(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def remove_generations_below(self, generation: int):
+        """Deletes the files of generations older than `generation`; readers that mapped them keep their pages."""
+        if not os.path.isdir(self.path):
+            return
+        for name in os.listdir(self.path):
+            parts = name.split(".")
+            file_generation = int(parts[1]) if len(parts) == 3 and parts[1].isdigit() else 0
+            if file_generation < generation:
+                os.remove(os.path.join(self.path, name))
+
+    def _remove_files(self, generation: int):
+        store = SegmentStore(self.validator_hotkey, self.namespace_id, root=self.root, generation=generation)
+        for file_path in (store.meta_path, store.embeddings_path, store.vector_ids_path):
+            if os.path.exists(file_path):
+                os.remove(file_path)
@@ -0,0 +1,484 @@
+import os
+import sqlite3
+import functools
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+import numpy as np
+import bittensor as bt
+from dotenv import load_dotenv
+from vectornet.search_engine import index_registry, lexical_registry
+from vectornet.database_manage.storage_backend import MinerStorage
+from vectornet.database_manage import compactor
+from vectornet.database_manage.segment_store import SegmentStore
+from vectornet.database_manage.namespace_vectors import NamespaceVectors
+from vectornet.database_manage.indexed_namespace import IndexedNamespace
+from vectornet.database_manage.embedding_cache import embedding_cache
+from vectornet.database_manage.name_cache import name_cache
+from vectornet.database_manage.miner_db_manager import normalize_embeddings
+from vectornet.database_manage.text_store import TEXT_COLUMNS, TEXT_JOINS, encode_text, row_texts, stored_text, text_blobs, text_hash
+
+load_dotenv()
+sqlite_dir = os.path.expanduser(os.getenv("MINER_SQLITE_DIR", "~/.vectornet/sqlite"))
+# Seconds a writer waits for another writer's transaction before failing
+sqlite_busy_timeout = float(os.getenv("MINER_SQLITE_BUSY_TIMEOUT_SECONDS", 30))
+
+# Schema of a validator's SQLite file, versioned through PRAGMA user_version like migrations.py.
+# AUTOINCREMENT keeps ids from ever being reused, which the name cache and the sidecars rely on.
+SQLITE_MIGRATIONS = (
+    (1, (
+        "CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE)",
+        """
+        CREATE TABLE IF NOT EXISTS organizations (
+            organization_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            user_id INTEGER REFERENCES users(user_id),
+            UNIQUE(name, user_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS namespaces (
+            namespace_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            user_id INTEGER REFERENCES users(user_id),
+            organization_id INTEGER REFERENCES organizations(organization_id),
+            vector_count INTEGER NOT NULL DEFAULT 0,
+            UNIQUE(name, organization_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vectors (
+            vector_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            original_text TEXT NOT NULL,
+            text TEXT NOT NULL,
+            embedding_norm REAL,
+            user_id INTEGER REFERENCES users(user_id),
+            organization_id INTEGER REFERENCES organizations(organization_id),
+            namespace_id INTEGER REFERENCES namespaces(namespace_id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS vectors_namespace_id_idx ON vectors (namespace_id)",
+        "CREATE INDEX IF NOT EXISTS vectors_user_id_idx ON vectors (user_id)",
+        "CREATE INDEX IF NOT EXISTS vectors_organization_id_idx ON vectors (organization_id)",
+        "CREATE INDEX IF NOT EXISTS namespaces_user_id_idx ON namespaces (user_id)",
+        "CREATE INDEX IF NOT EXISTS namespaces_organization_id_idx ON namespaces (organization_id)",
+        "CREATE INDEX IF NOT EXISTS organizations_user_id_idx ON organizations (user_id)",
+    )),
+    (2, (
+        "CREATE TABLE IF NOT EXISTS namespace_tombstones (namespace_id INTEGER PRIMARY KEY, deleted_at REAL NOT NULL DEFAULT (julianday('now')))",
+    )),
+    (3, (
+        "ALTER TABLE namespaces ADD COLUMN first_vector_id INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE namespaces ADD COLUMN segment_generation INTEGER NOT NULL DEFAULT 0",
+        "CREATE TABLE IF NOT EXISTS replaced_namespaces (namespace_id INTEGER PRIMARY KEY, first_vector_id INTEGER NOT NULL, replaced_at REAL NOT NULL DEFAULT (julianday('now')))",
+    )),
+    (4, (
+        # Rows written since keep empty inline texts and point at their content-addressed blobs
+        "CREATE TABLE IF NOT EXISTS texts (text_hash BLOB PRIMARY KEY, codec TEXT NOT NULL, content BLOB NOT NULL) WITHOUT ROWID",
+        "ALTER TABLE vectors ADD COLUMN text_hash BLOB",
+        "ALTER TABLE vectors ADD COLUMN original_text_hash BLOB",
+        "CREATE INDEX IF NOT EXISTS vectors_text_hash_idx ON vectors (text_hash)",
+        "CREATE INDEX IF NOT EXISTS vectors_original_text_hash_idx ON vectors (original_text_hash)",
+    )),
+)
+
+# SQLite parameters per statement stay below the default SQLITE_MAX_VARIABLE_NUMBER of older builds
+_MAX_PARAMETERS = 900
+
+# sqlite3 connections may not be shared across threads; each thread keeps one per file
+_local = threading.local()
+_migrated = set()
+_migrated_lock = threading.Lock()
+
+
+def database_path(validator_hotkey: str) -> str:
+    return os.path.join(sqlite_dir, f"{validator_hotkey}.sqlite3")
+
+
+def segment_root() -> str:
+    return os.path.join(sqlite_dir, "segments")
+
+
+def list_sqlite_databases() -> List[str]:
+    """List the validators that have a SQLite file."""
+    if not os.path.isdir(sqlite_dir):
+        return []
+    return [name[:-len(".sqlite3")] for name in os.listdir(sqlite_dir) if name.endswith(".sqlite3")]
+
+
+def connect(validator_hotkey: str) -> sqlite3.Connection:
+    """Returns this thread's connection to the validator's SQLite file, creating and migrating it on first use."""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(validator_hotkey)
+    if conn is None:
+        os.makedirs(sqlite_dir, exist_ok=True)
+        # Autocommit mode; transactions are opened explicitly with BEGIN IMMEDIATE
+        conn = sqlite3.connect(database_path(validator_hotkey), timeout=sqlite_busy_timeout, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=FULL")
+        migrate(validator_hotkey, conn)
+        connections[validator_hotkey] = conn
+    return conn
+
+
+def migrate(validator_hotkey: str, conn: sqlite3.Connection):
+    """Brings the file's schema up to date, once per file per process."""
+    if validator_hotkey in _migrated:
+        return
+    with _migrated_lock:
+        if validator_hotkey in _migrated:
+            return
+        current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for version, statements in SQLITE_MIGRATIONS:
+            if version <= current_version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            bt.logging.info(f"Applied SQLite migration {version} to '{validator_hotkey}'")
+        _migrated.add(validator_hotkey)
+
+
+class SQLiteDBManager(MinerStorage):
+    """
+    Embedded storage of one validator's data, for miners without a Postgres server.
+
+    Users, organizations, namespaces and texts live in a SQLite file in WAL mode
+    (<MINER_SQLITE_DIR>/<validator hotkey>.sqlite3), so reads never wait for writers and nothing
+    crosses a socket. Embeddings are L2-normalized and appended to a float32 SegmentStore sidecar
+    per namespace under <MINER_SQLITE_DIR>/segments, which reads memory-map without copying.
+
+    Sidecars are appended inside the SQLite write transaction that inserts the rows and bumps
+    namespaces.vector_count, so the committed rows are always the first vector_count rows of the
+    sidecar. A tail left by a crash or a rolled back write is ignored by reads and cut off by the
+    next write. A replace writes its vectors to the next generation of the sidecar and switches
+    namespaces.segment_generation to it in the same transaction.
+    """
+
+    def __init__(self, validator_hotkey: str):
+        super().__init__(validator_hotkey)
+        self.conn = connect(validator_hotkey)
+
+    @contextmanager
+    def transaction(self):
+        """Runs the block in a write transaction, taking SQLite's single writer lock up front."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.conn
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def segment_store(self, namespace_id: int, generation: int = 0) -> SegmentStore:
+        return SegmentStore(self.db_name, namespace_id, root=segment_root(), generation=generation)
+
+    def resolve_ids(self, user_name: str, organization_name: Optional[str] = None, namespace_name: Optional[str] = None) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """Resolve names to (user_id, organization_id, namespace_id) through the name cache and one joined query."""
+        names = (user_name, organization_name, namespace_name)
+        if None in names:
+            names = names[:names.index(None)]
+        cached = name_cache.get(self.db_name, names)
+        if cached is None:
+            generation = name_cache.generation(self.db_name)
+            row = self.conn.execute("""
+                SELECT u.user_id, o.organization_id, n.namespace_id
+                FROM users u
+                LEFT JOIN organizations o ON o.user_id = u.user_id AND o.name = :organization
+                LEFT JOIN namespaces n ON n.organization_id = o.organization_id AND n.user_id = u.user_id AND n.name = :namespace
+                WHERE u.name = :user
+            """, {'user': user_name, 'organization': organization_name, 'namespace': namespace_name}).fetchone()
+            cached = row[:len(names)] if row else (None,) * len(names)
+            name_cache.put(self.db_name, names, cached, generation)
+        return tuple(cached) + (None,) * (3 - len(cached))
+
+    def add_vectors(self, user_id: int, organization_id: int, namespace_id: int, vectors: List[dict], replace: bool = False) -> List[int]:
+        """
+        Add vectors to the namespace and return their new vector IDs, in order.
+
+        With `replace`, the vectors become the namespace's whole vector set: they go to a new
+        sidecar generation, and the older rows stay hidden behind first_vector_id until compact
+        deletes them.
+        """
+        if not vectors and not replace:
+            return []
+        cache_key = (self.db_name, namespace_id)
+        if vectors:
+            embeddings, norms = normalize_embeddings([vector['embedding'] for vector in vectors])
+        else:
+            embeddings, norms = np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.float32)
+        with self.transaction() as conn:
+            # Read under the write lock, so a replace that committed before it shows up as a mismatch
+            cache_generation, cache_version = embedding_cache.generation(cache_key), embedding_cache.version(cache_key)
+            # The write lock is held, so the ids after the sequence are ours
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'vectors'").fetchone()
+            first_id = (row[0] if row else 0) + 1
+            vector_ids = list(range(first_id, first_id + len(vectors)))
+            hashes = self.store_texts([vector['text'] for vector in vectors] + [vector['original_text'] for vector in vectors])
+            conn.executemany(
+                "INSERT INTO vectors (vector_id, original_text, text, text_hash, original_text_hash, embedding_norm, user_id, organization_id, namespace_id) VALUES (?, '', '', ?, ?, ?, ?, ?, ?)",
+                [
+                    (vector_id, hashes[i], hashes[len(vectors) + i], norm, user_id, organization_id, namespace_id)
+                    for i, (vector_id, norm) in enumerate(zip(vector_ids, norms.tolist()))
+                ],
+            )
+            vector_count, generation = conn.execute("SELECT vector_count, segment_generation FROM namespaces WHERE namespace_id = ?", (namespace_id,)).fetchone()
+            if replace:
+                vector_count, generation = 0, generation + 1
+                conn.execute(
+                    "UPDATE namespaces SET vector_count = 0, segment_generation = ?, first_vector_id = ? WHERE namespace_id = ?",
+                    (generation, first_id, namespace_id),
+                )
+                conn.execute("INSERT OR REPLACE INTO replaced_namespaces (namespace_id, first_vector_id) VALUES (?, ?)", (namespace_id, first_id))
+            segment_store = self.segment_store(namespace_id, generation)
+            if vectors:
+                # A replace with no vectors leaves the new generation to be created by the next write
+                if replace or not segment_store.exists():
+                    segment_store.create(embeddings.shape[1])
+                segment_store.truncate(vector_count)
+                segment_store.append(vector_ids, embeddings)
+                conn.execute("UPDATE namespaces SET vector_count = vector_count + ? WHERE namespace_id = ?", (len(vector_ids), namespace_id))
+        if replace:
+            embedding_cache.replace(cache_key, vector_ids, embeddings, normalized=True, version=cache_version)
+            # The indexes are rebuilt from the new set by the next reads
+            index_registry.drop_indexes(self.db_name, [namespace_id])
+            lexical_registry.drop_indexes(self.db_name, [namespace_id])
+            # The previous generation stays for reads that resolved it just before the commit
+            segment_store.remove_generations_below(generation - 1)
+            compactor.schedule(self.db_name)
+        else:
+            # Indexes first: a read snapshotting the cache in between then finds them ahead, not behind
+            index_registry.add_vectors(self.db_name, namespace_id, vector_ids, embeddings)
+            embedding_cache.extend(cache_key, vector_ids, embeddings, generation=cache_generation)
+            lexical_registry.add_texts(self.db_name, namespace_id, vector_ids, [vector['text'] for vector in vectors])
+        bt.logging.debug(f"success creating {len(vector_ids)} vectors")
+        return vector_ids
+
+    def store_texts(self, texts: List[str]) -> List[bytes]:
+        """Write the texts missing from the text store, inside the caller's write transaction, and return the hash of every text."""
+        blobs = text_blobs(texts)
+        digests = list(blobs)
+        for start in range(0, len(digests), _MAX_PARAMETERS):
+            chunk = digests[start:start + _MAX_PARAMETERS]
+            rows = self.conn.execute(f"SELECT text_hash FROM texts WHERE text_hash IN ({', '.join('?' * len(chunk))})", chunk).fetchall()
+            for row in rows:
+                blobs.pop(row[0], None)
+        self.conn.executemany("INSERT OR IGNORE INTO texts (text_hash, codec, content) VALUES (?, ?, ?)", [(digest, *encode_text(text)) for digest, text in blobs.items()])
+        return [text_hash(text) for text in texts]
+
+    def create_operation(self, request_type: str, user_name: str, organization_name: str, namespace_name: str, texts: List[str], embeddings: List[List[float]], original_texts: List[str]):
+        """Handle create operations."""
+        if request_type.lower() != 'create':
+            raise ValueError("Invalid request type. Expected 'create'.")
+
+        user_id, organization_id, _ = self.resolve_ids(user_name, organization_name)
+        with self.transaction() as conn:
+            if user_id is None:
+                conn.execute("INSERT OR IGNORE INTO users (name) VALUES (?)", (user_name,))
+                user_id = conn.execute("SELECT user_id FROM users WHERE name = ?", (user_name,)).fetchone()[0]
+            if organization_id is None:
+                conn.execute("INSERT OR IGNORE INTO organizations (name, user_id) VALUES (?, ?)", (organization_name, user_id))
+                organization_id = conn.execute("SELECT organization_id FROM organizations WHERE name = ? AND user_id = ?", (organization_name, user_id)).fetchone()[0]
+            namespace_id = conn.execute("INSERT INTO namespaces (name, user_id, organization_id) VALUES (?, ?, ?)", (namespace_name, user_id, organization_id)).lastrowid
+        name_cache.put(self.db_name, (user_name, organization_name, namespace_name), (user_id, organization_id, namespace_id))
+        # Drop a sidecar left behind by an earlier SQLite file of this validator
+        self.segment_store(namespace_id).remove()
+
+        vectors = [
+            {'original_text': original_text, 'text': text, 'embedding': embedding}
+            for original_text, text, embedding in zip(original_texts, texts, embeddings)
+        ]
+        vector_ids = self.add_vectors(user_id, organization_id, namespace_id, vectors)
+        bt.logging.debug("Success Create Operation.")
+        return user_id, organization_id, namespace_id, vector_ids
+
+    def resolve_namespace(self, user_name: str, organization_name: str, namespace_name: str) -> Tuple[int, int, int]:
+        """Resolve the ids of an existing namespace, raising if any level is missing."""
+        user_id, organization_id, namespace_id = self.resolve_ids(user_name, organization_name, namespace_name)
+        if user_id is None:
+            raise Exception(f"User '{user_name}' does not exist.")
+        if organization_id is None:
+            raise Exception(f"Organization '{organization_name}' does not exist for user '{user_name}'.")
+        if namespace_id is None:
+            raise Exception(f"Namespace '{namespace_name}' does not exist for user '{user_name}' and organization '{organization_name}'.")
+        return user_id, organization_id, namespace_id
+
+    def read_operation(self, request_type: str, user_name: str, organization_name: str, namespace_name: str):
+        """Handle read operations."""
+        if request_type.lower() != 'read':
+            raise ValueError("Invalid request type. Expected 'read'.")
+
+        user_id, organization_id, namespace_id = self.resolve_namespace(user_name, organization_name, namespace_name)
+
+        cache_key = (self.db_name, namespace_id)
+        search_index, _, indexed_size = index_registry.get_index_with_pending(self.db_name, namespace_id) if index_registry.index_type == 'ivfpq' else (None, [], 0)
+        if search_index is not None:
+            # Searched through its IVF-PQ codes; only the candidates of the re-rank are read back from the sidecar
+            embedding_cache.discard(cache_key)
+            vector_count, generation = self.conn.execute("SELECT vector_count, segment_generation FROM namespaces WHERE namespace_id = ?", (namespace_id,)).fetchone()
+            vectors = IndexedNamespace(search_index, functools.partial(self.segment_store(namespace_id, generation).fetch, rows=vector_count), indexed_size)
+        else:
+            vectors = embedding_cache.get(cache_key)
+        if vectors is None:
+            # A write committing while this loads makes the put a no-op instead of caching a stale snapshot
+            cache_version = embedding_cache.version(cache_key)
+            vector_count, generation = self.conn.execute("SELECT vector_count, segment_generation FROM namespaces WHERE namespace_id = ?", (namespace_id,)).fetchone()
+            segment_store = self.segment_store(namespace_id, generation)
+            if vector_count and segment_store.exists():
+                vector_ids, embeddings = segment_store.load()
+                # Rows past vector_count belong to a write that has not committed
+                vectors = NamespaceVectors(vector_ids[:vector_count], embeddings[:vector_count], normalized=True)
+            else:
+                vectors = NamespaceVectors(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32), normalized=True)
+            embedding_cache.put(cache_key, vectors.vector_ids, vectors.embeddings, vectors.normalized, version=cache_version)
+        if len(vectors) >= lexical_registry.lexical_threshold:
+            lexical_registry.ensure_index(self.db_name, namespace_id, len(vectors), lambda: self.read_namespace_texts(namespace_id))
+
+        bt.logging.debug(f"Success Read Operation. Embedding cache: {embedding_cache.stats()}")
+        return user_id, organization_id, namespace_id, vectors
+
+    def read_namespace_texts(self, namespace_id: int):
+        """Read the (vector_ids, texts) of a namespace; safe to call from a background thread."""
+        rows = connect(self.db_name).execute("""
+            SELECT v.vector_id, v.text, tt.codec, tt.content
+            FROM vectors v JOIN namespaces n USING (namespace_id)
+            LEFT JOIN texts tt ON tt.text_hash = v.text_hash
+            WHERE v.namespace_id = ? AND v.vector_id >= n.first_vector_id
+        """, (namespace_id,)).fetchall()
+        return [row[0] for row in rows], [stored_text(*row[1:4]) for row in rows]
+
+    def hydrate_vectors(self, vectors: List[dict]) -> List[dict]:
+        """Fill in 'original_text' and 'text' of the given vector dictionaries that were read without them."""
+        missing_ids = [vector['vector_id'] for vector in vectors if vector.get('original_text') is None]
+        texts = {}
+        for start in range(0, len(missing_ids), _MAX_PARAMETERS):
+            chunk = missing_ids[start:start + _MAX_PARAMETERS]
+            rows = self.conn.execute(
+                f"SELECT v.vector_id, {TEXT_COLUMNS} FROM vectors v {TEXT_JOINS} WHERE v.vector_id IN ({', '.join('?' * len(chunk))})", chunk
+            ).fetchall()
+            texts.update((row[0], row_texts(row[1:7])) for row in rows)
+
+        for vector in vectors:
+            if vector['vector_id'] in texts:
+                vector['original_text'], vector['text'] = texts[vector['vector_id']]
+        return vectors
+
+    def update_operation(self, request_type: str, perform: str, user_name: str, organization_name: str, namespace_name: str, texts: List[str], embeddings: List[List[float]], original_texts):
+        """Handle update operations."""
+        if request_type.lower() != 'update':
+            raise ValueError("Invalid request type. Must be 'update'.")
+
+        user_id, organization_id, namespace_id = self.resolve_namespace(user_name, organization_name, namespace_name)
+        vectors = [
+            {'original_text': original_text, 'text': text, 'embedding': embedding}
+            for original_text, text, embedding in zip(original_texts, texts, embeddings)
+        ]
+        vector_ids = self.add_vectors(user_id, organization_id, namespace_id, vectors, replace=(perform == 'replace'))
+        bt.logging.debug("Success Update Operation.")
+        return user_id, organization_id, namespace_id, vector_ids
+
+    def delete_operation(self, request_type: str, perform: str, user_name: Optional[str] = None, organization_name: Optional[str] = None, namespace_name: Optional[str] = None):
+        """Handle delete operations."""
+        if request_type.lower() != 'delete':
+            raise ValueError("Invalid request type. Must be 'delete'.")
+
+        if perform not in {'user', 'organization', 'namespace'}:
+            raise ValueError("Invalid perform action. Must be 'user', 'organization', or 'namespace'.")
+
+        if perform == 'user':
+            if not user_name:
+                raise ValueError("User name is required for user deletion.")
+            deleted_names = (user_name,)
+        elif perform == 'organization':
+            if not user_name or not organization_name:
+                raise ValueError("User and organization names are required for organization deletion.")
+            deleted_names = (user_name, organization_name)
+        else:
+            if not user_name or not organization_name or not namespace_name:
+                raise ValueError("User, organization, and namespace names are required for namespace deletion.")
+            deleted_names = (user_name, organization_name, namespace_name)
+
+        user_id, organization_id, namespace_id = self.resolve_ids(*deleted_names)
+        if perform == 'user' and user_id is None:
+            raise Exception(f"User '{user_name}' does not exist.")
+        if perform == 'organization' and organization_id is None:
+            raise Exception(f"Organization '{organization_name}' does not exist for user '{user_name}'.")
+        if perform == 'namespace' and namespace_id is None:
+            raise Exception(f"Namespace '{namespace_name}' does not exist for user '{user_name}' and organization '{organization_name}'.")
+
+        # The deepest level that was named decides which rows go
+        column, value = {
+            'user': ('user_id', user_id), 'organization': ('organization_id', organization_id), 'namespace': ('namespace_id', namespace_id),
+        }[perform]
+        # Logical delete: the vector rows stay behind a tombstone until compact removes them
+        with self.transaction() as conn:
+            deleted_namespace_ids = [row[0] for row in conn.execute(f"SELECT namespace_id FROM namespaces WHERE {column} = ?", (value,))]
+            conn.executemany("INSERT OR IGNORE INTO namespace_tombstones (namespace_id) VALUES (?)", [(deleted_namespace_id,) for deleted_namespace_id in deleted_namespace_ids])
+            conn.execute(f"DELETE FROM namespaces WHERE {column} = ?", (value,))
+            if perform in ('user', 'organization'):
+                conn.execute(f"DELETE FROM organizations WHERE {column} = ?", (value,))
+            if perform == 'user':
+                conn.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+
+        name_cache.invalidate(self.db_name, deleted_names)
+        index_registry.drop_indexes(self.db_name, deleted_namespace_ids)
+        lexical_registry.drop_indexes(self.db_name, deleted_namespace_ids)
+        for deleted_namespace_id in deleted_namespace_ids:
+            embedding_cache.invalidate((self.db_name, deleted_namespace_id))
+            self.segment_store(deleted_namespace_id).remove()
+        compactor.schedule(self.db_name)
+        bt.logging.debug("Success Delete Operation")
+        return user_id, organization_id, namespace_id
+
+    def compact(self, batch_rows: int, should_continue=lambda: True) -> bool:
+        """Remove the vector rows of tombstoned namespaces and those superseded by replaces, with the text blobs only they referenced, one short write transaction per batch; freed pages are reused by later inserts."""
+        reclaimed = 0
+        namespace_ids = [row[0] for row in self.conn.execute("SELECT namespace_id FROM namespace_tombstones ORDER BY deleted_at")]
+        for namespace_id in namespace_ids:
+            while True:
+                if not should_continue():
+                    return False
+                deleted = self.delete_vector_batch("namespace_id = ?", (namespace_id,), batch_rows)
+                reclaimed += deleted
+                if deleted < batch_rows:
+                    break
+            with self.transaction() as conn:
+                conn.execute("DELETE FROM namespace_tombstones WHERE namespace_id = ?", (namespace_id,))
+
+        replaced = self.conn.execute("SELECT namespace_id, first_vector_id FROM replaced_namespaces ORDER BY replaced_at").fetchall()
+        for namespace_id, first_vector_id in replaced:
+            while True:
+                if not should_continue():
+                    return False
+                deleted = self.delete_vector_batch("namespace_id = ? AND vector_id < ?", (namespace_id, first_vector_id), batch_rows)
+                reclaimed += deleted
+                if deleted < batch_rows:
+                    break
+            with self.transaction() as conn:
+                # A replace committed meanwhile keeps its own, newer entry
+                conn.execute("DELETE FROM replaced_namespaces WHERE namespace_id = ? AND first_vector_id = ?", (namespace_id, first_vector_id))
+        if reclaimed:
+            bt.logging.info(f"Compacted {reclaimed} deleted vectors of '{self.db_name}'.")
+        return True
+
+    def delete_vector_batch(self, condition: str, params: tuple, batch_rows: int) -> int:
+        """Delete up to `batch_rows` vector rows matching `condition`, and the text blobs only they referenced, in one write transaction."""
+        with self.transaction() as conn:
+            rows = conn.execute(f"SELECT vector_id, text_hash, original_text_hash FROM vectors WHERE {condition} LIMIT ?", (*params, batch_rows)).fetchall()
+            conn.executemany("DELETE FROM vectors WHERE vector_id = ?", [(row[0],) for row in rows])
+            hashes = {digest for row in rows for digest in row[1:] if digest is not None}
+            conn.executemany("""
+                DELETE FROM texts
+                WHERE text_hash = :digest
+                    AND NOT EXISTS (SELECT 1 FROM vectors WHERE text_hash = :digest)
+                    AND NOT EXISTS (SELECT 1 FROM vectors WHERE original_text_hash = :digest)
+            """, [{'digest': digest} for digest in hashes])
+        return len(rows)
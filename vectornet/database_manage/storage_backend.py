@@ -0,0 +1,75 @@
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+# 'postgres' keeps every validator's data in its own Postgres database (MinerDBManager),
+# 'sqlite' in an embedded SQLite file with memory-mapped embedding sidecars (SQLiteDBManager)
+storage_backend = os.getenv("MINER_STORAGE_BACKEND", "postgres").lower()
+if storage_backend not in ('postgres', 'sqlite'):
+    raise ValueError(f"MINER_STORAGE_BACKEND must be 'postgres' or 'sqlite', got '{storage_backend}'")
+
+
+class MinerStorage(ABC):
+    """
+    Storage of the users, organizations, namespaces and vectors one validator sent to the miner.
+
+    Every backend keeps the same semantics: create, update and delete return the
+    (user_id, organization_id, namespace_id, ...) ids of what they touched, and read returns the
+    namespace ids and its vectors as something SearchEngine.search_batch can rank, such as
+    NamespaceVectors. Texts that a read leaves out are filled in by hydrate_vectors.
+    """
+
+    def __init__(self, validator_hotkey: str):
+        self.db_name = validator_hotkey
+
+    @abstractmethod
+    def create_operation(self, request_type: str, user_name: str, organization_name: str, namespace_name: str, texts: List[str], embeddings: List[List[float]], original_texts: List[str]):
+        ...
+
+    @abstractmethod
+    def read_operation(self, request_type: str, user_name: str, organization_name: str, namespace_name: str):
+        ...
+
+    @abstractmethod
+    def hydrate_vectors(self, vectors: List[dict]) -> List[dict]:
+        ...
+
+    @abstractmethod
+    def update_operation(self, request_type: str, perform: str, user_name: str, organization_name: str, namespace_name: str, texts: List[str], embeddings: List[List[float]], original_texts):
+        ...
+
+    @abstractmethod
+    def delete_operation(self, request_type: str, perform: str, user_name: Optional[str] = None, organization_name: Optional[str] = None, namespace_name: Optional[str] = None):
+        ...
+
+    @abstractmethod
+    def compact(self, batch_rows: int, should_continue=lambda: True) -> bool:
+        """Reclaims the space of deleted namespaces; returns False if should_continue stopped it early."""
+        ...
+
+
+def get_db_manager(validator_hotkey: str) -> MinerStorage:
+    """Returns the storage of a validator's data on the configured MINER_STORAGE_BACKEND."""
+    if storage_backend == 'sqlite':
+        from vectornet.database_manage.sqlite_db_manager import SQLiteDBManager
+        return SQLiteDBManager(validator_hotkey)
+    from vectornet.database_manage.miner_db_manager import MinerDBManager
+    return MinerDBManager(validator_hotkey)
+
+
+def list_databases() -> List[str]:
+    """Lists the validators that have data on the configured backend."""
+    if storage_backend == 'sqlite':
+        from vectornet.database_manage.sqlite_db_manager import list_sqlite_databases
+        return list_sqlite_databases()
+    from vectornet.database_manage.miner_db_manager import list_validator_databases
+    return list_validator_databases()
+
+
+def prepare_storage():
+    """Startup maintenance of the configured backend; SQLite files are migrated when first opened."""
+    if storage_backend == 'postgres':
+        from vectornet.database_manage.miner_db_manager import prepare_validator_databases
+        prepare_validator_databases()
@@ -0,0 +1,101 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from dotenv import load_dotenv
+from vectornet.database_manage.connection_pool import get_pool
+from vectornet.search_engine.kernels import cosine_score_matrix, inner_product_score_matrix, top_k_indices
+
+load_dotenv()
+# Namespaces whose embeddings are in the vectors table are streamed instead of loaded from this many vectors on
+streaming_threshold = int(os.getenv("MINER_STREAMING_THRESHOLD", 500000))
+# Rows fetched from the server-side cursor and scored at a time
+stream_chunk_rows = int(os.getenv("MINER_STREAM_CHUNK_ROWS", 10000))
+
+
+class StreamingNamespace:
+    """
+    A namespace too large to load, searched by one pass over a server-side cursor.
+
+    MinerDBManager.read_operation returns it instead of NamespaceVectors for namespaces stored in
+    the vectors table with at least MINER_STREAMING_THRESHOLD vectors. Rows arrive in chunks of
+    MINER_STREAM_CHUNK_ROWS; every chunk is scored against all queries with one matrix product and
+    merged into the running top results of each query, so memory stays bounded by the chunk size.
+    The next chunk is fetched while the current one is scored.
+    """
+
+    def __init__(self, db_name: str, namespace_id: int, size: int, chunk_rows: int = None):
+        self.db_name = db_name
+        self.namespace_id = namespace_id
+        self.size = size
+        self.chunk_rows = chunk_rows or stream_chunk_rows
+
+    def __len__(self):
+        return self.size
+
+    def search_batch(self, query_embeddings, sizes):
+        """
+        Finds the most similar vectors of every query by cosine similarity.
+
+        Returns:
+            list: For every query, its top vectors as search result dictionaries without texts, best first.
+        """
+        from vectornet.database_manage.miner_db_manager import decode_embeddings
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1)
+        best = [(np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64), None) for _ in sizes]
+        with get_pool(self.db_name).connection() as conn:
+            with conn.cursor() as cur:
+                # The cursor lives in this transaction, which also gives the scan one snapshot
+                cur.execute("BEGIN")
+                try:
+                    cur.execute("""
+                        DECLARE namespace_scan NO SCROLL CURSOR FOR
+                        SELECT v.embedding, v.vector_id, v.embedding_format, v.embedding_codes, v.embedding_scale, v.embedding_offset, v.embedding_norm
+                        FROM vectors v JOIN namespaces n USING (namespace_id)
+                        WHERE v.namespace_id = %s AND v.vector_id >= n.first_vector_id
+                    """, (self.namespace_id,))
+
+                    def fetch():
+                        cur.execute("FETCH FORWARD %s FROM namespace_scan", (self.chunk_rows,))
+                        return cur.fetchall()
+
+                    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="namespace-scan") as prefetcher:
+                        pending = prefetcher.submit(fetch)
+                        while True:
+                            rows = pending.result()
+                            if not rows:
+                                break
+                            pending = prefetcher.submit(fetch)
+                            matrix = decode_embeddings([(row[0], *row[2:6]) for row in rows])
+                            vector_ids = np.array([row[1] for row in rows], dtype=np.int64)
+                            if all(row[6] is not None for row in rows):
+                                score_matrix = inner_product_score_matrix(queries, matrix)
+                            else:
+                                score_matrix = cosine_score_matrix(queries, matrix)
+                            best = [
+                                self.merge(current, scores, vector_ids, matrix, size)
+                                for current, scores, size in zip(best, score_matrix, sizes)
+                            ]
+                finally:
+                    # Read only; ending the transaction closes the cursor
+                    cur.execute("ROLLBACK")
+
+        return [
+            [
+                {'original_text': None, 'text': None, 'embedding': embeddings[position], 'vector_id': int(vector_ids[position]), 'similarity': float(scores[position])}
+                for position in range(len(vector_ids))
+            ]
+            for scores, vector_ids, embeddings in best
+        ]
+
+    @staticmethod
+    def merge(current, scores, vector_ids, matrix, size):
+        """Merges the top `size` rows of a chunk into a query's running top results, kept best first."""
+        chunk_top = top_k_indices(scores, size)
+        best_scores, best_ids, best_embeddings = current
+        # Earlier rows come first, so ties keep the order a full scan would give
+        merged_scores = np.concatenate([best_scores, scores[chunk_top]])
+        merged_ids = np.concatenate([best_ids, vector_ids[chunk_top]])
+        merged_embeddings = matrix[chunk_top] if best_embeddings is None else np.concatenate([best_embeddings, matrix[chunk_top]])
+        keep = top_k_indices(merged_scores, size)
+        return merged_scores[keep], merged_ids[keep], merged_embeddings[keep]
@@ -0,0 +1,86 @@
+import os
+import zlib
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional
+from dotenv import load_dotenv
+
+try:
+    import zstandard
+except ImportError:  # Listed in requirements.txt; without it new texts fall back to zlib, and zstd ones cannot be read
+    zstandard = None
+
+load_dotenv()
+# Codec of newly stored texts: 'zstd' (falls back to 'zlib' without the zstandard package), 'zlib' or 'none'
+text_codec = os.getenv("MINER_TEXT_CODEC", "zstd").lower()
+if text_codec not in ('zstd', 'zlib', 'none'):
+    raise ValueError(f"MINER_TEXT_CODEC must be 'zstd', 'zlib' or 'none', got '{text_codec}'")
+if text_codec == 'zstd' and zstandard is None:
+    text_codec = 'zlib'
+text_compression_level = int(os.getenv("MINER_TEXT_COMPRESSION_LEVEL", 3))
+
+# Texts shorter than this are stored as is, compression would only add its framing to them
+_MIN_COMPRESSED_BYTES = 64
+
+# zstandard (de)compressors may not be shared across threads
+_local = threading.local()
+
+# Texts of a vectors row `v`: the content-addressed blobs, or the inline columns of rows stored before them
+TEXT_JOINS = "LEFT JOIN texts ot ON ot.text_hash = v.original_text_hash LEFT JOIN texts tt ON tt.text_hash = v.text_hash"
+TEXT_COLUMNS = "v.original_text, ot.codec, ot.content, v.text, tt.codec, tt.content"
+
+
+def text_hash(text: str) -> bytes:
+    """SHA-256 digest of the UTF-8 text, the key of its blob."""
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def encode_text(text: str):
+    """
+    Compress a text for the blob store.
+
+    Returns:
+        tuple: (codec, content) where content is the compressed UTF-8 bytes.
+    """
+    data = text.encode("utf-8")
+    if text_codec == 'none' or len(data) < _MIN_COMPRESSED_BYTES:
+        return 'none', data
+    if text_codec == 'zstd':
+        compressor = getattr(_local, 'compressor', None)
+        if compressor is None:
+            compressor = _local.compressor = zstandard.ZstdCompressor(level=text_compression_level)
+        return 'zstd', compressor.compress(data)
+    return 'zlib', zlib.compress(data, text_compression_level)
+
+
+def decode_text(codec: str, content) -> str:
+    """Decompress a blob written by encode_text."""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise Exception("Stored texts are zstd compressed; install the zstandard package to read them.")
+        decompressor = getattr(_local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = _local.decompressor = zstandard.ZstdDecompressor()
+        data = decompressor.decompress(bytes(content))
+    elif codec == 'zlib':
+        data = zlib.decompress(content)
+    else:
+        data = bytes(content)
+    return data.decode("utf-8")
+
+
+def stored_text(inline: Optional[str], codec: Optional[str], content) -> Optional[str]:
+    """The text of one column selected through TEXT_JOINS: its blob if it has one, else the inline value."""
+    if codec is None:
+        return inline
+    return decode_text(codec, content)
+
+
+def row_texts(columns):
+    """(original_text, text) of the six TEXT_COLUMNS values of a row."""
+    return stored_text(*columns[0:3]), stored_text(*columns[3:6])
+
+
+def text_blobs(texts: Iterable[str]) -> Dict[bytes, str]:
+    """The distinct texts keyed by their hash; a text sent as both text and original_text is stored once."""
+    return {text_hash(text): text for text in texts}
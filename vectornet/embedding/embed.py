@@ -1,24 +1,27 @@
 import os
-from transformers import LongformerTokenizer, LongformerModel
-import torch
-import transformers
+import threading
 import bittensor as bt
 
-print(f"PyTorch version: {torch.__version__}")
-print(f"CUDA available: {torch.cuda.is_available()}")
-if torch.cuda.is_available():
-    print(f"CUDA device: {torch.cuda.get_device_name(0)}")
-    print(f"CUDA version: {torch.version.cuda}")
-    print(f"Initial CUDA memory allocated: {torch.cuda.memory_allocated()/1024**2:.2f}MB")
-    print(f"Initial CUDA memory cached: {torch.cuda.memory_reserved()/1024**2:.2f}MB")
-
-transformers.logging.set_verbosity_error()
-
+# torch and transformers are imported on first use, so importing this module stays cheap
 os.environ['TORCH_USE_CUDA_DSA'] = '1'  # Enable device-side assertions
 os.environ['CUDA_LAUNCH_BLOCKING'] = '1'
 
+_tokenizer = None
+_model = None
+_model_lock = threading.Lock()
+
+
 def initialize_model():
     try:
+        import torch
+        import transformers
+        from transformers import LongformerTokenizer, LongformerModel
+
+        transformers.logging.set_verbosity_error()
+        bt.logging.debug(f"PyTorch version: {torch.__version__}, CUDA available: {torch.cuda.is_available()}")
+        if torch.cuda.is_available():
+            bt.logging.debug(f"CUDA device: {torch.cuda.get_device_name(0)}, CUDA version: {torch.version.cuda}")
+
         # Initialize tokenizer and model
         tokenizer = LongformerTokenizer.from_pretrained("allenai/longformer-base-4096")
         model = LongformerModel.from_pretrained("allenai/longformer-base-4096")
@@ -35,19 +38,33 @@ def initialize_model():
         bt.logging.error(f"Model initialization error: {str(e)}")
         raise
 
-# Initialize model and tokenizer globally
-tokenizer, model = initialize_model()
+
+def get_model():
+    """Returns the shared (tokenizer, model), loading them on the first call; concurrent callers wait for that one load."""
+    global _tokenizer, _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _tokenizer, _model = initialize_model()
+    return _tokenizer, _model
+
+
+def warmup():
+    """Loads the embedding model ahead of the first request."""
+    get_model()
+
 
 class TextToEmbedding:
     def __init__(self):
+        import torch
         self.max_token_size = 4096  # Longformer's maximum token size
-        self.tokenizer = tokenizer
-        self.model = model
+        self.tokenizer, self.model = get_model()
         self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
         bt.logging.debug(f"TextToEmbedding initialized on device: {self.device}")
     
     def print_debug_info(self, inputs, global_attention_mask):
         """Print debug information about tensors and devices"""
+        import torch
         print("\n=== Debug Information ===")
         print(f"Input IDs shape: {inputs['input_ids'].shape}")
         print(f"Attention mask shape: {inputs['attention_mask'].shape}")
@@ -58,6 +75,7 @@ class TextToEmbedding:
         print("========================\n")
 
     def embed(self, texts):
+        import torch
         try:
             # Input validation data
             if not texts:
@@ -119,6 +137,7 @@ class TextToEmbedding:
             raise
 
     def mean_pooling(self, embedding, attention_mask):
+        import torch
         try:
             attention_mask = attention_mask.unsqueeze(-1)
             summed_embeddings = torch.sum(embedding * attention_mask, 1)
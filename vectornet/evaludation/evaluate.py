@@ -1,10 +1,9 @@
-import torch
 import bittensor as bt
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from vectornet.embedding.embed import TextToEmbedding
 from vectornet.wiki_integraion.wiki_scraper import get_wiki_article_content_with_pageid
 from vectornet.search_engine.search import SearchEngine
+from vectornet.search_engine.kernels import cosine_scores
 import asyncio
 
 def evaluate_create_request(response, validator_db_manager, query, pageids):
@@ -139,7 +138,7 @@ def evaluate_similarity(original_content, content):
     original_content_embedding_np = np.array(original_embedding_tensor).reshape(1, -1)
     content_embedding_np = np.array(content_embedding_tensor).reshape(1, -1)
         
-    similarity_score = cosine_similarity(original_content_embedding_np, content_embedding_np)[0][0]
+    similarity_score = float(cosine_scores(original_content_embedding_np, content_embedding_np)[0])
     bt.logging.info(f"Calculated similarity_score: {similarity_score}.")
     return similarity_score
 
@@ -0,0 +1,96 @@
+import re
+import math
+import threading
+from array import array
+from collections import Counter
+import numpy as np
+from vectornet.search_engine.kernels import top_k_indices
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+# Frequent English words whose postings would span most of a namespace without separating its documents
+STOPWORDS = frozenset("""
+    a an and are as at be been but by can did do does for from had has have he her his how i if in into is it its
+    itself may more most no not of on or our she so such than that the their them then there these they this those
+    to was we were what when where which while who will with would you your
+""".split())
+
+
+def tokenize(text: str):
+    """Lowercased word tokens of the text, without stopwords and single characters."""
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Inverted index of a namespace's texts scored with Okapi BM25.
+
+    Every term maps to the positions of the documents containing it and its frequency in each,
+    kept in growable typed arrays so a query reads them as numpy arrays without copying.
+    Document position i holds vector_ids[i].
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vector_ids = array('q')
+        self._id_set = set()
+        self._doc_lengths = array('I')
+        self._total_length = 0
+        self._postings = {}  # term -> (positions array('i'), term frequencies array('I'))
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.vector_ids)
+
+    def add(self, vector_ids, texts):
+        """Indexes the texts under the given vector ids, skipping ids already indexed."""
+        with self._lock:
+            for vector_id, text in zip(vector_ids, texts):
+                vector_id = int(vector_id)
+                if vector_id in self._id_set:
+                    continue
+                position = len(self.vector_ids)
+                tokens = tokenize(text or '')
+                for term, frequency in Counter(tokens).items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array('i'), array('I'))
+                    postings[0].append(position)
+                    postings[1].append(frequency)
+                self.vector_ids.append(vector_id)
+                self._id_set.add(vector_id)
+                self._doc_lengths.append(len(tokens))
+                self._total_length += len(tokens)
+
+    def search(self, query_text: str, k: int):
+        """
+        Finds the k documents with the highest BM25 score for the query.
+
+        Documents sharing no term with the query are never returned, so fewer than k may come back.
+
+        Returns:
+            tuple: (vector_ids, scores) best first.
+        """
+        with self._lock:
+            n = len(self.vector_ids)
+            if n == 0:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            doc_lengths = np.frombuffer(self._doc_lengths, dtype=np.uint32)[:n].astype(np.float32)
+            length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / max(self._total_length / n, 1e-9))
+
+            scores = np.zeros(n, dtype=np.float32)
+            for term, query_frequency in Counter(tokenize(query_text or '')).items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                positions = np.frombuffer(postings[0], dtype=np.int32)
+                frequencies = np.frombuffer(postings[1], dtype=np.uint32).astype(np.float32)
+                df = len(positions)
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                scores[positions] += query_frequency * idf * frequencies * (self.k1 + 1) / (frequencies + length_norm[positions])
+            # Arrays exporting their buffer cannot grow; release the views before add() can run again
+            positions = frequencies = None
+
+            matched = np.flatnonzero(scores)
+            best = matched[top_k_indices(scores[matched], k)]
+            return np.frombuffer(self.vector_ids, dtype=np.int64)[best].copy(), scores[best]
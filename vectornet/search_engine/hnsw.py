@@ -0,0 +1,161 @@
+import heapq
+import math
+import threading
+import numpy as np
+from vectornet.search_engine.kernels import normalize_rows
+
+
+class HNSWIndex:
+    """
+    Hierarchical Navigable Small World graph for approximate cosine similarity search.
+
+    Vectors are L2-normalized on insertion so the graph works on the inner product
+    distance (1 - cosine similarity). Graph node i holds vector_ids[i].
+    """
+
+    def __init__(self, dim: int, m: int = 16, ef_construction: int = 200, ef_search: int = 64, seed=None):
+        """
+        Args:
+            dim (int): Dimension of the indexed embeddings.
+            m (int): Number of links per node on the upper layers (2 * m on layer 0).
+            ef_construction (int): Size of the candidate list while inserting.
+            ef_search (int): Default size of the candidate list while searching.
+            seed: Seed for the level generator, for reproducible graphs.
+        """
+        self.dim = dim
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = max(ef_construction, m)
+        self.ef_search = ef_search
+        self.vector_ids = []
+        self._id_set = set()
+        self._level_mult = 1 / math.log(max(m, 2))
+        self._rng = np.random.default_rng(seed)
+        self._data = np.zeros((0, dim), dtype=np.float32)
+        self._count = 0
+        self._links = []  # node -> one neighbor list per level
+        self._entry_point = None
+        self._max_level = -1
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._count
+
+    def add(self, vector_ids, embeddings):
+        """Inserts the embeddings under the given vector ids, skipping ids already indexed."""
+        matrix = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim))
+        with self._lock:
+            for vector_id, vector in zip(vector_ids, matrix):
+                if vector_id in self._id_set:
+                    continue
+                self._insert(self._append(vector_id, vector))
+
+    def search(self, query_embedding, k: int, ef: int = None):
+        """
+        Finds the approximate k nearest vectors to the query.
+
+        Returns:
+            tuple: (vector_ids, scores) best first, scores being cosine similarities.
+        """
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            if self._entry_point is None:
+                return [], np.empty(0, dtype=np.float32)
+            entry_points = [self._entry_point]
+            for level in range(self._max_level, 0, -1):
+                entry_points = [self._search_layer(query, entry_points, 1, level)[0][1]]
+            results = self._search_layer(query, entry_points, max(ef or self.ef_search, k), 0)[:k]
+            vector_ids = [self.vector_ids[node] for _, node in results]
+        scores = np.array([1.0 - distance for distance, _ in results], dtype=np.float32)
+        return vector_ids, scores
+
+    def _append(self, vector_id, vector) -> int:
+        if self._count == self._data.shape[0]:
+            grown = np.zeros((max(16, 2 * self._count), self.dim), dtype=np.float32)
+            grown[:self._count] = self._data[:self._count]
+            self._data = grown
+        self._data[self._count] = vector
+        self.vector_ids.append(vector_id)
+        self._id_set.add(vector_id)
+        self._count += 1
+        return self._count - 1
+
+    def _distances(self, query, nodes):
+        return 1.0 - self._data[nodes] @ query
+
+    def _search_layer(self, query, entry_points, ef: int, level: int):
+        """Greedy best-first search of one layer, returns up to ef (distance, node) pairs sorted by distance."""
+        visited = set(entry_points)
+        candidates = list(zip(self._distances(query, entry_points).tolist(), entry_points))
+        heapq.heapify(candidates)
+        results = [(-distance, node) for distance, node in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            distance, node = heapq.heappop(candidates)
+            if distance > -results[0][0]:
+                break
+            neighbors = [neighbor for neighbor in self._links[node][level] if neighbor not in visited]
+            if not neighbors:
+                continue
+            visited.update(neighbors)
+            for neighbor_distance, neighbor in zip(self._distances(query, neighbors).tolist(), neighbors):
+                if len(results) < ef or neighbor_distance < -results[0][0]:
+                    heapq.heappush(candidates, (neighbor_distance, neighbor))
+                    heapq.heappush(results, (-neighbor_distance, neighbor))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted((-distance, node) for distance, node in results)
+
+    def _select_neighbors(self, candidates, max_connections: int):
+        """
+        Picks links with the HNSW heuristic: a candidate is kept only if it is closer to the
+        new node than to every neighbor already kept. Pruned candidates fill any remaining slots.
+        """
+        if len(candidates) <= max_connections:
+            return [node for _, node in candidates]
+
+        selected, pruned = [], []
+        for distance, node in candidates:
+            if len(selected) >= max_connections:
+                break
+            if selected and 1.0 - np.max(self._data[selected] @ self._data[node]) < distance:
+                pruned.append(node)
+                continue
+            selected.append(node)
+        selected.extend(pruned[:max_connections - len(selected)])
+        return selected
+
+    def _insert(self, node: int):
+        query = self._data[node]
+        level = int(-math.log(1.0 - self._rng.random()) * self._level_mult)
+        self._links.append([[] for _ in range(level + 1)])
+
+        if self._entry_point is None:
+            self._entry_point, self._max_level = node, level
+            return
+
+        entry_points = [self._entry_point]
+        for layer in range(self._max_level, level, -1):
+            entry_points = [self._search_layer(query, entry_points, 1, layer)[0][1]]
+
+        for layer in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, entry_points, self.ef_construction, layer)
+            neighbors = self._select_neighbors(candidates, self.m)
+            self._links[node][layer] = neighbors
+
+            max_connections = self.m0 if layer == 0 else self.m
+            for neighbor in neighbors:
+                links = self._links[neighbor][layer]
+                links.append(node)
+                if len(links) > max_connections:
+                    distances = self._distances(self._data[neighbor], links).tolist()
+                    self._links[neighbor][layer] = self._select_neighbors(sorted(zip(distances, links)), max_connections)
+            entry_points = [candidate for _, candidate in candidates]
+
+        if level > self._max_level:
+            self._entry_point, self._max_level = node, level
+
@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import deque
+import numpy as np
+import bittensor as bt
+from dotenv import load_dotenv
+from vectornet.search_engine.hnsw import HNSWIndex
+from vectornet.search_engine.ivfpq import IVFPQIndex
+
+load_dotenv()
+index_type = os.getenv("MINER_INDEX_TYPE", "hnsw").lower()
+# Measured with vectornet.benchmark.search_benchmark at 768 dims: brute force wins at 5k vectors, the index from 20k
+index_threshold = int(os.getenv("MINER_INDEX_THRESHOLD", 20000))
+rerank_factor = int(os.getenv("MINER_RERANK_FACTOR", 10))
+hnsw_m = int(os.getenv("MINER_HNSW_M", 16))
+hnsw_ef_construction = int(os.getenv("MINER_HNSW_EF_CONSTRUCTION", 200))
+hnsw_ef_search = int(os.getenv("MINER_HNSW_EF_SEARCH", 64))
+ivf_nlist = int(os.getenv("MINER_IVF_NLIST", 1024))
+ivf_nprobe = int(os.getenv("MINER_IVF_NPROBE", 32))
+pq_m = int(os.getenv("MINER_PQ_M", 96))
+
+
+class _IndexEntry:
+    """
+    Registry slot of one namespace. `index` stays None while the first build runs in the background.
+
+    Written vectors wait in `pending` until a background drain inserts them into the index, one
+    at a time under `lock`, so writers never pay for graph inserts and searches interleave with them.
+    """
+
+    def __init__(self):
+        self.index = None
+        self.pending = deque()  # (vector_id, embedding) rows not inserted yet
+        self.draining = False
+        self.lock = threading.Lock()
+
+
+# Process-wide approximate indexes keyed by (validator hotkey, namespace_id).
+_entries = {}
+_lock = threading.Lock()
+
+
+def _new_index(dim: int):
+    if index_type == 'ivfpq':
+        return IVFPQIndex(dim, nlist=ivf_nlist, pq_m=pq_m, nprobe=ivf_nprobe)
+    return HNSWIndex(dim, m=hnsw_m, ef_construction=hnsw_ef_construction, ef_search=hnsw_ef_search)
+
+
+def get_index(validator_hotkey: str, namespace_id: int):
+    """Returns the ready index of the namespace, or None if it has none or it is still being built."""
+    with _lock:
+        entry = _entries.get((validator_hotkey, namespace_id))
+        return entry.index if entry else None
+
+
+def get_index_with_pending(validator_hotkey: str, namespace_id: int):
+    """
+    Returns the ready index of the namespace with the vectors written to it that the index has
+    not inserted yet, which searches score exactly next to its candidates.
+
+    Returns:
+        tuple: (index or None, pending vector ids, number of vectors indexed or pending), taken at one instant.
+    """
+    with _lock:
+        entry = _entries.get((validator_hotkey, namespace_id))
+    if entry is None:
+        return None, [], 0
+    with entry.lock:
+        if entry.index is None:
+            return None, [], 0
+        return entry.index, [vector_id for vector_id, _ in entry.pending], len(entry.index) + len(entry.pending)
+
+
+def schedule_build(validator_hotkey: str, namespace_id: int, vector_ids, matrix):
+    """
+    Builds the namespace index from a snapshot of its vectors in a background thread.
+
+    Reads keep using brute force until the build finishes. Writes that land meanwhile are
+    queued on the entry and drained into the graph once it is ready.
+    """
+    key = (validator_hotkey, namespace_id)
+    with _lock:
+        if key in _entries:
+            return
+        entry = _entries[key] = _IndexEntry()
+
+    def build():
+        try:
+            index = _new_index(matrix.shape[1])
+            index.add(vector_ids, matrix)
+        except Exception as e:
+            bt.logging.error(f"Error building search index for namespace {namespace_id}: {e}")
+            with _lock:
+                if _entries.get(key) is entry:
+                    del _entries[key]
+            return
+
+        with _lock:
+            if _entries.get(key) is not entry:
+                return  # Dropped while building
+        with entry.lock:
+            entry.index = index
+            start_drain = bool(entry.pending) and not entry.draining
+            entry.draining = entry.draining or start_drain
+        if start_drain:
+            threading.Thread(target=_drain, args=(key, entry), daemon=True).start()
+        bt.logging.debug(f"Search index ready for namespace {namespace_id} with {len(index)} vectors")
+
+    threading.Thread(target=build, daemon=True).start()
+
+
+def _drain(key, entry):
+    """Inserts the pending vectors of an entry into its index until none are left or it is dropped."""
+    try:
+        while True:
+            with _lock:
+                if _entries.get(key) is not entry:
+                    return
+            with entry.lock:
+                if not entry.pending:
+                    entry.draining = False
+                    return
+                vector_id, embedding = entry.pending[0]
+                entry.index.add([vector_id], embedding[None])
+                entry.pending.popleft()
+    except Exception as e:
+        bt.logging.error(f"Error inserting into the search index of namespace {key[1]}: {e}")
+        # Rebuilt from the stored vectors by the next read
+        with _lock:
+            if _entries.get(key) is entry:
+                del _entries[key]
+
+
+def add_vectors(validator_hotkey: str, namespace_id: int, vector_ids, embeddings):
+    """Queues newly stored vectors for the namespace index, if one exists; they are inserted in the background."""
+    key = (validator_hotkey, namespace_id)
+    with _lock:
+        entry = _entries.get(key)
+    if entry is None or not len(vector_ids):
+        return
+    matrix = np.asarray(embeddings, dtype=np.float32).reshape(len(vector_ids), -1)
+    with entry.lock:
+        entry.pending.extend(zip(vector_ids, matrix))
+        start_drain = entry.index is not None and not entry.draining
+        entry.draining = entry.draining or start_drain
+    if start_drain:
+        threading.Thread(target=_drain, args=(key, entry), daemon=True).start()
+
+
+def drop_indexes(validator_hotkey: str, namespace_ids):
+    """Forgets the indexes of the given namespaces, e.g. after they were deleted."""
+    with _lock:
+        for namespace_id in namespace_ids:
+            _entries.pop((validator_hotkey, namespace_id), None)
@@ -0,0 +1,156 @@
+import threading
+import numpy as np
+from vectornet.search_engine.kernels import normalize_rows, top_k_indices
+
+
+def nearest_centroids(data, centroids, chunk_size: int = 16384):
+    """Returns the index of the closest centroid (squared L2) for every row of data, scoring in chunks."""
+    centroid_norms = (centroids ** 2).sum(axis=1)
+    assignments = np.empty(data.shape[0], dtype=np.int64)
+    for start in range(0, data.shape[0], chunk_size):
+        block = data[start:start + chunk_size]
+        assignments[start:start + chunk_size] = np.argmin(centroid_norms - 2 * block @ centroids.T, axis=1)
+    return assignments
+
+
+def kmeans(data, k: int, iterations: int = 20, seed=None):
+    """
+    Lloyd's k-means on the rows of data.
+
+    Returns:
+        np.ndarray: (min(k, len(data)), dim) float32 centroids.
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, data.shape[0])
+    centroids = data[rng.choice(data.shape[0], k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignments = nearest_centroids(data, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        counts = np.bincount(assignments, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # Reseed empty clusters with random points so every centroid stays useful
+        empty = np.flatnonzero(~filled)
+        if empty.size:
+            centroids[empty] = data[rng.choice(data.shape[0], empty.size)]
+    return centroids
+
+
+class IVFPQIndex:
+    """
+    Inverted file index with product quantization for approximate cosine similarity search.
+
+    Vectors are L2-normalized, assigned to their nearest coarse centroid, and the residual is
+    stored as `pq_m` one-byte codes. Queries probe the `nprobe` closest lists and rank their
+    entries with asymmetric distance computation (exact query against quantized vectors).
+    A 768-dim vector costs pq_m bytes plus its id instead of 3 KB of float32.
+    """
+
+    def __init__(self, dim: int, nlist: int = 256, pq_m: int = 96, nprobe: int = 16, training_size: int = 65536, seed=None):
+        """
+        Args:
+            dim (int): Dimension of the indexed embeddings.
+            nlist (int): Number of coarse centroids / inverted lists.
+            pq_m (int): Number of sub-quantizers; lowered to the nearest divisor of dim.
+            nprobe (int): Number of inverted lists visited per query.
+            training_size (int): Maximum number of vectors used to train centroids and codebooks.
+            seed: Seed for training, for reproducible indexes.
+        """
+        self.dim = dim
+        self.nlist = nlist
+        self.pq_m = max(m for m in range(1, min(pq_m, dim) + 1) if dim % m == 0)
+        self.dsub = dim // self.pq_m
+        self.nprobe = nprobe
+        self.training_size = training_size
+        self.centroids = None
+        self.codebooks = None  # (pq_m, ksub, dsub)
+        self._seed = seed
+        self._list_ids = []
+        self._list_codes = []
+        self._count = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def train(self, embeddings):
+        """Trains the coarse centroids and the PQ codebooks on (a sample of) the given embeddings."""
+        data = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim))
+        rng = np.random.default_rng(self._seed)
+        if data.shape[0] > self.training_size:
+            data = data[rng.choice(data.shape[0], self.training_size, replace=False)]
+
+        centroids = kmeans(data, self.nlist, seed=self._seed)
+        residuals = data - centroids[nearest_centroids(data, centroids)]
+        codebooks = [
+            kmeans(np.ascontiguousarray(residuals[:, i * self.dsub:(i + 1) * self.dsub]), 256, seed=self._seed)
+            for i in range(self.pq_m)
+        ]
+
+        with self._lock:
+            self.centroids = centroids
+            self.codebooks = np.stack(codebooks)
+            self._list_ids = [np.empty(0, dtype=np.int64) for _ in range(centroids.shape[0])]
+            self._list_codes = [np.empty((0, self.pq_m), dtype=np.uint8) for _ in range(centroids.shape[0])]
+            self._count = 0
+
+    def add(self, vector_ids, embeddings):
+        """Encodes and stores the embeddings. The first call trains the index on its own batch."""
+        data = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(-1, self.dim))
+        with self._lock:
+            if not self.is_trained:
+                self.train(data)
+            lists = nearest_centroids(data, self.centroids)
+            codes = self._encode(data - self.centroids[lists])
+            vector_ids = np.asarray(vector_ids, dtype=np.int64)
+            for list_no in np.unique(lists):
+                members = lists == list_no
+                self._list_ids[list_no] = np.concatenate([self._list_ids[list_no], vector_ids[members]])
+                self._list_codes[list_no] = np.concatenate([self._list_codes[list_no], codes[members]])
+            self._count += data.shape[0]
+
+    def search(self, query_embedding, k: int, nprobe: int = None):
+        """
+        Finds approximately the k nearest vectors to the query.
+
+        Returns:
+            tuple: (vector_ids, scores) best first. Scores are cosine similarities estimated from
+            the quantized vectors, so callers should re-rank them against the exact embeddings.
+        """
+        query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(1, -1))[0]
+        with self._lock:
+            if not self.is_trained or self._count == 0:
+                return [], np.empty(0, dtype=np.float32)
+            coarse = ((self.centroids - query) ** 2).sum(axis=1)
+            probes = np.argsort(coarse)[:nprobe or self.nprobe]
+
+            ids, distances = [], []
+            for list_no in probes:
+                if self._list_ids[list_no].size == 0:
+                    continue
+                residual = (query - self.centroids[list_no]).reshape(self.pq_m, 1, self.dsub)
+                table = ((self.codebooks - residual) ** 2).sum(axis=2)  # (pq_m, ksub)
+                codes = self._list_codes[list_no]
+                ids.append(self._list_ids[list_no])
+                distances.append(table[np.arange(self.pq_m), codes].sum(axis=1))
+
+        if not ids:
+            return [], np.empty(0, dtype=np.float32)
+        ids = np.concatenate(ids)
+        scores = 1.0 - np.concatenate(distances) / 2  # |a - b|^2 = 2 - 2 cos(a, b) on unit vectors
+        best = top_k_indices(scores, k)
+        return ids[best].tolist(), scores[best].astype(np.float32)
+
+    def _encode(self, residuals):
+        codes = np.empty((residuals.shape[0], self.pq_m), dtype=np.uint8)
+        for i in range(self.pq_m):
+            codes[:, i] = nearest_centroids(
+                np.ascontiguousarray(residuals[:, i * self.dsub:(i + 1) * self.dsub]), self.codebooks[i]
+            )
+        return codes
+
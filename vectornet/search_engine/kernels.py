@@ -0,0 +1,86 @@
+import numpy as np
+from vectornet.search_engine.quantization import QuantizedEmbeddings
+
+
+def embedding_matrix(vectors):
+    """
+    Stacks the embeddings of the given vectors into one contiguous float32 matrix.
+
+    Args:
+        vectors (list): A list of dictionaries, each containing an 'embedding'.
+
+    Returns:
+        np.ndarray: A (len(vectors), dim) float32 matrix, row i holding vectors[i]['embedding'].
+    """
+    embeddings = getattr(vectors, 'embeddings', None)
+    if isinstance(embeddings, QuantizedEmbeddings):
+        return embeddings.dequantize()
+    if embeddings is not None:
+        return embeddings  # Already stacked by the storage layer (NamespaceVectors)
+    return np.ascontiguousarray(
+        np.array([vector['embedding'] for vector in vectors], dtype=np.float32)
+    )
+
+
+def cosine_scores(query_embedding, matrix):
+    """
+    Scores every row of matrix against the query with a single matrix-vector product.
+
+    Rows (or a query) with zero norm score 0, matching sklearn's cosine_similarity.
+    """
+    query = np.asarray(query_embedding, dtype=np.float32).ravel()
+    query_norm = np.linalg.norm(query)
+    if query_norm == 0:
+        return np.zeros(matrix.shape[0], dtype=np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    return (matrix @ query) / (norms * query_norm)
+
+
+def cosine_score_matrix(query_embeddings, matrix):
+    """
+    Scores every row of matrix against every query with a single matrix-matrix product.
+
+    Returns:
+        np.ndarray: A (len(query_embeddings), len(matrix)) float32 matrix of cosine similarities.
+    """
+    queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+    norms = np.linalg.norm(matrix, axis=1)
+    norms[norms == 0] = 1.0
+    return (queries @ matrix.T) / norms
+
+
+def inner_product_score_matrix(query_embeddings, matrix):
+    """
+    Cosine scores of pre-normalized rows against every query: one matrix-matrix product with the
+    normalized queries, no per-row norms.
+    """
+    queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+    return queries @ matrix.T
+
+
+def top_k_indices(scores, k):
+    """
+    Returns the indices of the k highest scores, best first.
+
+    Uses argmax when k == 1 and argpartition otherwise, so only the winners get sorted.
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k == 1:
+        return np.array([np.argmax(scores)])
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def normalize_rows(matrix):
+    """Scales every row of matrix to unit L2 norm, leaving zero rows untouched."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
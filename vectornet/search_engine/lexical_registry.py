@@ -0,0 +1,89 @@
+import os
+import threading
+import bittensor as bt
+from dotenv import load_dotenv
+from vectornet.search_engine.bm25 import BM25Index
+
+load_dotenv()
+lexical_threshold = int(os.getenv("MINER_LEXICAL_THRESHOLD", 10000))
+lexical_candidates = int(os.getenv("MINER_LEXICAL_CANDIDATES", 1000))
+
+
+class _LexicalEntry:
+    """Registry slot of one namespace. `index` stays None while the first build runs in the background."""
+
+    def __init__(self):
+        self.index = None
+        self.pending = []
+
+
+# Process-wide BM25 indexes keyed by (validator hotkey, namespace_id).
+_entries = {}
+_lock = threading.Lock()
+
+
+def get_index(validator_hotkey: str, namespace_id: int):
+    """Returns the ready BM25 index of the namespace, or None if it has none or it is still being built."""
+    with _lock:
+        entry = _entries.get((validator_hotkey, namespace_id))
+        return entry.index if entry else None
+
+
+def ensure_index(validator_hotkey: str, namespace_id: int, size: int, load_texts):
+    """
+    Makes sure the namespace has a BM25 index covering its `size` vectors.
+
+    A missing index, or one behind the stored vectors (e.g. writes made by an earlier miner
+    process), is (re)built in a background thread from `load_texts()`, which returns the
+    namespace's (vector_ids, texts). Writes that land meanwhile are queued and applied afterwards.
+    An index ahead of `size` already has writes this process made since the caller counted.
+    """
+    key = (validator_hotkey, namespace_id)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and (entry.index is None or len(entry.index) >= size):
+            return
+        entry = _entries[key] = _LexicalEntry()
+
+    def build():
+        try:
+            vector_ids, texts = load_texts()
+            index = BM25Index()
+            index.add(vector_ids, texts)
+        except Exception as e:
+            bt.logging.error(f"Error building BM25 index for namespace {namespace_id}: {e}")
+            with _lock:
+                if _entries.get(key) is entry:
+                    del _entries[key]
+            return
+
+        with _lock:
+            if _entries.get(key) is not entry:
+                return  # Dropped while building
+            for pending_ids, pending_texts in entry.pending:
+                index.add(pending_ids, pending_texts)
+            entry.pending = []
+            entry.index = index
+        bt.logging.debug(f"BM25 index ready for namespace {namespace_id} with {len(index)} texts")
+
+    threading.Thread(target=build, daemon=True).start()
+
+
+def add_texts(validator_hotkey: str, namespace_id: int, vector_ids, texts):
+    """Adds the texts of newly stored vectors to the namespace index, if one exists."""
+    with _lock:
+        entry = _entries.get((validator_hotkey, namespace_id))
+        if entry is None:
+            return
+        if entry.index is None:
+            entry.pending.append((list(vector_ids), list(texts)))
+            return
+        index = entry.index
+    index.add(vector_ids, texts)
+
+
+def drop_indexes(validator_hotkey: str, namespace_ids):
+    """Forgets the BM25 indexes of the given namespaces, e.g. after they were deleted."""
+    with _lock:
+        for namespace_id in namespace_ids:
+            _entries.pop((validator_hotkey, namespace_id), None)
@@ -0,0 +1,127 @@
+import numpy as np
+
+# Storage formats of the vectors table: 'float' keeps the FLOAT[] column, the others store
+# little-endian codes ('float32' being the exact embedding with scale 1 and offset 0)
+EMBEDDING_FORMATS = ('float', 'float32', 'float16', 'int8')
+_CODE_DTYPES = {'float32': np.dtype('<f4'), 'float16': np.dtype('<f2'), 'int8': np.dtype('i1')}
+
+
+class QuantizedEmbeddings:
+    """
+    Scalar-quantized embedding matrix: row i is reconstructed as codes[i] * scales[i] + offsets[i].
+
+    int8 codes use a per-vector scale and offset (1 byte per dimension), float16 codes keep the
+    value itself with scale 1 and offset 0 (2 bytes per dimension), versus 8 bytes for FLOAT[].
+    """
+
+    def __init__(self, embedding_format: str, codes, scales, offsets, norms=None):
+        self.embedding_format = embedding_format
+        self.codes = codes
+        self.scales = np.asarray(scales, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.float32)
+        self._norms = norms
+
+    @classmethod
+    def quantize(cls, embeddings, embedding_format: str):
+        """Encodes a float matrix (one embedding per row) in the given format."""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        matrix = matrix.reshape(matrix.shape[0], -1)
+        if embedding_format == 'float16':
+            return cls('float16', matrix.astype(_CODE_DTYPES['float16']), np.ones(len(matrix)), np.zeros(len(matrix)))
+        if embedding_format != 'int8':
+            raise ValueError(f"Unknown quantized embedding format: {embedding_format}")
+
+        low, high = matrix.min(axis=1), matrix.max(axis=1)
+        offsets = (high + low) / 2
+        scales = (high - low) / 254
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint((matrix - offsets[:, None]) / scales[:, None]), -127, 127).astype(np.int8)
+        return cls('int8', codes, scales, offsets)
+
+    @classmethod
+    def from_rows(cls, embedding_format: str, codes, scales, offsets):
+        """Builds the matrix from the stored per-row code bytes, scales and offsets."""
+        dtype = _CODE_DTYPES[embedding_format]
+        matrix = np.frombuffer(b''.join(bytes(code) for code in codes), dtype=dtype).reshape(len(codes), -1)
+        return cls(embedding_format, matrix, scales, offsets)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes + self.offsets.nbytes
+
+    def __len__(self):
+        return self.codes.shape[0]
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            norms = self._norms[position] if self._norms is not None else None
+            return QuantizedEmbeddings(
+                self.embedding_format, self.codes[position], self.scales[position], self.offsets[position], norms
+            )
+        return self.codes[position].astype(np.float32) * self.scales[position] + self.offsets[position]
+
+    def row_bytes(self, position: int) -> bytes:
+        return self.codes[position].tobytes()
+
+    def dequantize(self, positions=None):
+        """Reconstructs the given rows (all by default) as a float32 matrix."""
+        if positions is None:
+            positions = slice(None)
+        return self.codes[positions].astype(np.float32) * self.scales[positions, None] + self.offsets[positions, None]
+
+    def concatenate(self, other: "QuantizedEmbeddings") -> "QuantizedEmbeddings":
+        norms = None
+        if self._norms is not None and other._norms is not None:
+            norms = np.concatenate([self._norms, other._norms])
+        return QuantizedEmbeddings(
+            self.embedding_format,
+            np.concatenate([self.codes, other.codes]),
+            np.concatenate([self.scales, other.scales]),
+            np.concatenate([self.offsets, other.offsets]),
+            norms,
+        )
+
+    def norms(self, chunk_size: int = 65536):
+        """L2 norms of the reconstructed rows, computed once from the codes."""
+        if self._norms is None:
+            norms = np.empty(len(self), dtype=np.float32)
+            dim = self.codes.shape[1]
+            for start in range(0, len(self), chunk_size):
+                block = self.codes[start:start + chunk_size].astype(np.float32)
+                scales = self.scales[start:start + chunk_size]
+                offsets = self.offsets[start:start + chunk_size]
+                # |s c + o|^2 = s^2 |c|^2 + 2 s o sum(c) + dim o^2
+                squared = scales ** 2 * (block ** 2).sum(axis=1) + 2 * scales * offsets * block.sum(axis=1) + dim * offsets ** 2
+                norms[start:start + chunk_size] = np.sqrt(np.maximum(squared, 0))
+            self._norms = norms
+        return self._norms
+
+    def cosine_scores(self, query_embedding, chunk_size: int = 65536):
+        """
+        Cosine similarity of the query against every reconstructed row, scoring the codes chunk
+        by chunk so the full float32 matrix is never materialized.
+
+        A (q, dim) matrix of queries is scored in the same pass and yields a (q, n) score matrix.
+        """
+        queries = np.asarray(query_embedding, dtype=np.float32)
+        batched = queries.ndim == 2
+        queries = queries.reshape(-1, self.codes.shape[1]) if batched else queries.reshape(1, -1)
+        query_norms = np.linalg.norm(queries, axis=1)
+        query_norms[query_norms == 0] = np.inf  # Zero queries score 0 everywhere
+
+        query_sums = queries.sum(axis=1)
+        dots = np.empty((len(queries), len(self)), dtype=np.float32)
+        for start in range(0, len(self), chunk_size):
+            block = self.codes[start:start + chunk_size].astype(np.float32)
+            dots[:, start:start + chunk_size] = (
+                self.scales[start:start + chunk_size] * (queries @ block.T)
+                + self.offsets[start:start + chunk_size] * query_sums[:, None]
+            )
+        norms = self.norms().copy()
+        norms[norms == 0] = 1.0
+        scores = dots / (norms * query_norms[:, None])
+        return scores if batched else scores[0]
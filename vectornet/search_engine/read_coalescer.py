@@ -0,0 +1,56 @@
+import os
+import asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+read_batch_window_ms = float(os.getenv("MINER_READ_BATCH_WINDOW_MS", 5))
+read_batch_size = int(os.getenv("MINER_READ_BATCH_SIZE", 32))
+
+
+class ReadCoalescer:
+    """
+    Groups concurrent read requests for the same key (e.g. the same namespace) into one batch.
+
+    The first request of a key opens a window of `window_ms` milliseconds; every request for that
+    key arriving meanwhile joins the batch, which is flushed when the window closes or holds
+    `max_batch` requests. The batch is handed to `handler(key, items)` on the default executor so
+    the event loop keeps accepting requests; the handler returns one result per item, in order.
+    """
+
+    def __init__(self, handler, window_ms: float = read_batch_window_ms, max_batch: int = read_batch_size):
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._batches = {}
+
+    async def submit(self, key, item):
+        """Adds the item to the open batch of its key and waits for its result."""
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = []
+            loop.call_later(self.window, self._flush, key, batch)
+        future = loop.create_future()
+        batch.append((item, future))
+        if len(batch) >= self.max_batch:
+            self._flush(key, batch)
+        return await future
+
+    def _flush(self, key, batch):
+        if self._batches.get(key) is not batch:
+            return  # Already flushed because it was full
+        del self._batches[key]
+        asyncio.ensure_future(self._run(key, batch))
+
+    async def _run(self, key, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(None, self.handler, key, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
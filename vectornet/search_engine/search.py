@@ -1,44 +1,165 @@
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from vectornet.search_engine import index_registry, lexical_registry
+from vectornet.search_engine.kernels import (
+    embedding_matrix, cosine_scores, cosine_score_matrix, inner_product_score_matrix, top_k_indices,
+)
+from vectornet.search_engine.quantization import QuantizedEmbeddings
+
 
 class SearchEngine:
     def __init__(self):
         pass
-    
-    def cosine_similarity_search(self, query_embedding, vectors, size):
+
+    def cosine_similarity_search(self, query_embedding, vectors, size, index_key=None, query_text=None):
         """
         Finds the most similar embeddings in the vectors based on the query_embedding.
-        
+
         Args:
             query_embedding (list): The embedding list representing the query text.
-            vectors (list): A list of dictionaries, each containing 'original_text', 'text', and 'embedding'.
+            vectors (list): A list of dictionaries, each containing 'original_text', 'text', and 'embedding',
+                or the NamespaceVectors or PgvectorNamespace of a read. Texts missing from the vectors are None in the results.
             size(int): A number of return values
-            
+            index_key (tuple, optional): (validator hotkey, namespace_id) of the vectors. Namespaces past
+                the index threshold are then searched through their approximate nearest neighbour index
+                (HNSW or IVF-PQ, see MINER_INDEX_TYPE). An IndexedNamespace is always searched through its own.
+            query_text (str, optional): The query text. With an index_key, namespaces past the lexical
+                threshold then only score the candidates of their BM25 index densely.
+
         Returns:
             list: A number of top vectors in sorted list of dictionaries with the most similar texts and their similarity scores.
         """
-        similarities = []
+        query_texts = None if query_text is None else [query_text]
+        return self.search_batch([query_embedding], vectors, size, index_key=index_key, query_texts=query_texts)[0]
+
+    def search_batch(self, query_embeddings, vectors, sizes, index_key=None, query_texts=None):
+        """
+        Runs cosine_similarity_search for several queries against the same vectors at once.
+
+        Brute-force searches score all queries in one matrix-matrix product instead of one scan per
+        query, so concurrent reads of a namespace cost about as much as a single one.
+
+        Args:
+            query_embeddings (list): The query embeddings.
+            vectors (list): The searched vectors, as for cosine_similarity_search.
+            sizes (int or list): The number of results of every query, or one per query.
+            index_key (tuple, optional): (validator hotkey, namespace_id) of the vectors.
+            query_texts (list, optional): The query texts, for the BM25 candidate pass.
+
+        Returns:
+            list: The cosine_similarity_search results of every query, in query order.
+        """
+        if isinstance(sizes, int):
+            sizes = [sizes] * len(query_embeddings)
+        if not vectors or not len(query_embeddings):
+            return [[] for _ in query_embeddings]
+        if hasattr(vectors, 'search_batch'):
+            # Namespaces searched by their storage (pgvector) only hand back their top rows
+            return vectors.search_batch(query_embeddings, sizes)
+
+        results = [None] * len(query_embeddings)
+        if query_texts is not None and index_key is not None and len(vectors) >= lexical_registry.lexical_threshold:
+            lexical_index = lexical_registry.get_index(*index_key)
+            if lexical_index is not None:
+                for position, (query_text, query_embedding, size) in enumerate(zip(query_texts, query_embeddings, sizes)):
+                    # BM25 prunes the namespace to a few candidates; queries sharing too few terms fall back to dense search
+                    vector_ids, _ = lexical_index.search(query_text, max(lexical_registry.lexical_candidates, size))
+                    if len(vector_ids) >= size:
+                        reranked = self.rerank(query_embedding, vectors, vector_ids, size)
+                        # Candidates of vectors the index outlived (deleted or replaced) are dropped by the re-rank
+                        if len(reranked) >= size:
+                            results[position] = reranked
+
+        dense = [position for position, result in enumerate(results) if result is None]
+        if dense:
+            dense_results = self.dense_search_batch(
+                [query_embeddings[position] for position in dense], vectors, [sizes[position] for position in dense], index_key
+            )
+            for position, result in zip(dense, dense_results):
+                results[position] = result
+        return results
 
-        # Convert query_embedding to a numpy array
-        query_embedding_array = np.array(query_embedding).reshape(1, -1)
+    def dense_search_batch(self, query_embeddings, vectors, sizes, index_key=None):
+        """search_batch without the BM25 pass: the ANN index of large namespaces, brute force otherwise."""
+        index, pending_ids = getattr(vectors, 'search_index', None), []
+        if index is not None:
+            if index_key is not None:
+                _, pending_ids, _ = index_registry.get_index_with_pending(*index_key)
+        elif index_key is not None and len(vectors) >= index_registry.index_threshold:
+            index, pending_ids = self.namespace_index(index_key, vectors)
+        if index is not None:
+            return [
+                self.index_search(index, query_embedding, vectors, size, pending_ids)
+                for query_embedding, size in zip(query_embeddings, sizes)
+            ]
 
-        for vector in vectors:
-            # Extract the embedding from the vector
-            vector_embedding = np.array(vector['embedding']).reshape(1, -1)  # Convert to numpy array
+        embeddings = getattr(vectors, 'embeddings', None)
+        if isinstance(embeddings, QuantizedEmbeddings):
+            # Scored straight from the codes; they are all that is stored, so there is nothing more exact to re-rank against
+            score_matrix = embeddings.cosine_scores(np.asarray(query_embeddings, dtype=np.float32))
+        elif getattr(vectors, 'normalized', False):
+            score_matrix = inner_product_score_matrix(query_embeddings, embedding_matrix(vectors))
+        else:
+            score_matrix = cosine_score_matrix(query_embeddings, embedding_matrix(vectors))
 
-            # Calculate cosine similarity
-            similarity_score = cosine_similarity(query_embedding_array, vector_embedding)[0][0]
+        # Only the winners are turned back into result dictionaries
+        return [
+            [self.search_result(vectors[index], scores[index]) for index in top_k_indices(scores, size)]
+            for scores, size in zip(score_matrix, sizes)
+        ]
+
+    def index_search(self, index, query_embedding, vectors, size, pending_ids=()):
+        """
+        Searches the namespace index; it only proposes candidates, which are re-ranked exactly against
+        the stored embeddings together with the `pending_ids` written since the index last caught up.
+        """
+        vector_ids, _ = index.search(query_embedding, size * index_registry.rerank_factor)
+        if len(pending_ids):
+            vector_ids = list(dict.fromkeys([*vector_ids, *pending_ids]))
+        return self.rerank(query_embedding, vectors, vector_ids, size)
+
+    def rerank(self, query_embedding, vectors, vector_ids, size):
+        """Scores the candidate vector ids exactly against the query and returns the top `size` results."""
+        candidates = self.vectors_by_ids(vectors, vector_ids)
+        if not candidates:
+            return []
+        scores = cosine_scores(query_embedding, embedding_matrix(candidates))
+        return [self.search_result(candidates[position], scores[position]) for position in top_k_indices(scores, size)]
+
+    def namespace_index(self, index_key, vectors):
+        """
+        Returns the ready index of the namespace with the ids of the vectors it has not inserted
+        yet, or (None, []) when the caller has to brute force.
+
+        A missing index, or one behind the stored vectors (e.g. writes made by an earlier miner
+        process), is (re)built in the background from the given vectors. An index ahead of them
+        holds writes this process made after the snapshot; the re-rank skips ids it lacks.
+        """
+        validator_hotkey, namespace_id = index_key
+        index, pending_ids, size = index_registry.get_index_with_pending(validator_hotkey, namespace_id)
+        if index is not None and size >= len(vectors):
+            return index, pending_ids
 
-            # Store the similarity score along with the associated text
-            similarities.append({
-                'original_text': vector['original_text'],
-                'text': vector['text'],
-                'embedding': vector['embedding'],
-                'vector_id': vector['vector_id'],
-                'similarity': similarity_score,
-            })
+        if index is not None:
+            index_registry.drop_indexes(validator_hotkey, [namespace_id])
+        vector_ids = vectors.vector_ids if hasattr(vectors, 'vector_ids') else [vector['vector_id'] for vector in vectors]
+        index_registry.schedule_build(validator_hotkey, namespace_id, vector_ids, embedding_matrix(vectors))
+        return None, []
 
-        # Sort by similarity score in descending order and return the results
-        results = sorted(similarities, key=lambda x: x['similarity'], reverse=True)
+    def vectors_by_ids(self, vectors, vector_ids):
+        """Returns the vectors with the given ids, in the given order, skipping unknown ids."""
+        if hasattr(vectors, 'fetch'):
+            # An IndexedNamespace reads them from storage
+            return vectors.fetch(vector_ids)
+        if hasattr(vectors, 'positions'):
+            return [vectors[position] for position in vectors.positions(vector_ids)]
+        vectors_by_id = {vector['vector_id']: vector for vector in vectors}
+        return [vectors_by_id[vector_id] for vector_id in vector_ids if vector_id in vectors_by_id]
 
-        return results[:size]
+    def search_result(self, vector, score):
+        return {
+            'original_text': vector.get('original_text'),
+            'text': vector.get('text'),
+            'embedding': vector['embedding'],
+            'vector_id': vector['vector_id'],
+            'similarity': float(score),
+        }
@@ -2,7 +2,6 @@ import yaml
 import random
 import bittensor as bt
 from traceback import print_exception
-import openai
 import os
 from vectornet.wiki_integraion.wiki_scraper import wikipedia_scraper
 from dotenv import load_dotenv
@@ -87,6 +86,7 @@ async def generate_read_request(validator_db_manager, max_len):
 
     # print("CONTENT is", content)
         
+    import openai  # Only validators generating queries need it, imported on first use
     llm_client = openai.OpenAI(
         api_key = os.getenv("OPENAI_API_KEY"),
         max_retries = 3,
@@ -1,7 +1,6 @@
 import os
 import bittensor as bt
 import datetime
-import wandb
 from dotenv import load_dotenv
 
 from vectornet import __version__ as version
@@ -25,6 +24,8 @@ class WandbManager:
         
         """Creates a new wandb for validators' logs"""
         
+        import wandb  # Imported on first use; validators running with --wandb.off never load it
+
         self.wandb_start = datetime.date.today()
         current = datetime.datetime.now().strftime("%Y-%m-%d_%H:%M:%S")
         